@@ -1,7 +1,4 @@
 from driver_builder import DriverBuilder
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import pandas as pd
 import numpy as np
@@ -11,43 +8,115 @@ import time
 import logging
 from string import punctuation
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing.util import Finalize
 from lists_and_dicts import state_codes, street_sfx, state_map
+from checkpoint import ScrapeCheckpoint
+from desc_fingerprints import DescriptionIndex, description_keys
+from driver_supervisor import SESSION_ERRORS, DriverSupervisor
+from instrumentation import ScrapeMetrics
+from page_readiness import AdaptiveTimeout, wait_for_script
+from posting_extractors import description_loaded
+from scrape_config import load_config
+from scrape_logging import init_worker_logging, setup_logging, start_run
+from site_adapters import SITE_ADAPTERS
+from aggregates import AnalyticsAggregates
+from export_files import commit_export, verify_export, write_csv_tmp
+from job_store import write_job_store
+from posting_index import PostingIndex, duplicated_postings, posting_keys
+from schema import (
+    PULL_DATE_FORMAT,
+    enforce_job_descriptions_schema,
+    enforce_job_meta_schema,
+    read_job_descriptions,
+    read_job_meta,
+)
 
 
-# wait time controls how long selenium waits before trying again to find the elemement
-wait_time = 3
+# the run settings, from the profile, scraper.toml and the environment (.env included). see scrape_config.py
+CONFIG = load_config()
+# wait time is how long selenium waits for an element (or the next page) until the scraper has learned how fast the site is,
+# see page_readiness.py
+wait_time = CONFIG["wait_time"]
+# how often (in seconds) the scraper checkpoints its progress so a crash only costs a couple minutes of re-fetching
+checkpoint_every = CONFIG["checkpoint_every"]
 # this controls where the data will be put once it's scraped.
-PATH = os.getenv("DATA_PATH")
-LOG_PATH = os.getenv("LOG_PATH")
-# this controls if the scraper opens a browser GUI or just runs in headless mode in the background
-HEADLESS = False
-
-# websites we'll be scraping
-dj_site = "https://datajobs.com/"
-indeed_site = "https://indeed.com/"
-# this pattern pulls jobs specifically from datajobs
-dj_pattern = r"<a href=\"(.*)\"><strong>(.*)</strong> – <span [^\>]*>(.*)</span></a>[\n\s]*</div>[\n\s]*<div[^\>]*>[\n\s]*<em>[\n\s]*<span[^\>]*>(.*)</span>[\n\s]*[\&nbsp;\•]*[\n\s]*\$*([\d,]*)[–\s]*\$*([\d,]*)[\n\s]*</em>"
-col_list = ["url", "title", "company", "location", "salary_lower", "salary_upper"]
-
-logging.basicConfig(
-    filename=LOG_PATH + "/main.log",
-    format="%(levelname)s - %(asctime)s:%(message)s",
-    encoding="utf-8",
-    level=logging.WARNING,
-)
+PATH = CONFIG["data_path"]
+LOG_PATH = CONFIG["log_path"]
+# this controls if the scraper opens a browser GUI or just runs in headless mode in the background, and if the browser skips
+# images, extensions, etc.
+HEADLESS = CONFIG["headless"]
+LEAN_BROWSER = CONFIG["lean_browser"]
+# the most pages of a job board (or search) to go through
+MAX_PAGES = CONFIG["max_pages"]
+# how many of the next job board pages load in background tabs while the current page is parsed
+prefetch_pages = CONFIG["prefetch_pages"]
+# how many job postings load at once, each in its own tab of the one browser (0 loads them one at a time in the main tab)
+posting_tabs = CONFIG["posting_tabs"]
+# when to recycle the browser, how long a page can hang it and how often a page is retried on a new one (driver_supervisor.py)
+recycle_pages = CONFIG["recycle_pages"]
+recycle_rss_mb = CONFIG["recycle_rss_mb"]
+watchdog_timeout = CONFIG["watchdog_timeout"]
+driver_retries = CONFIG["driver_retries"]
+# how many bits a re-visited description's SimHash can be off and still count as unchanged, 0 only exact matches
+simhash_distance = CONFIG["simhash_distance"]
+# worker processes for sharded runs
+WORKERS = CONFIG["workers"]
+# scales the sites' pauses between requests, 0 turns the rate limiting off
+delay_scale = CONFIG["delay_scale"]
+# "arrow" also writes the memory mapped .arrow copies on export, "csv" only the csv files
+storage = CONFIG["storage"]
+
+# the default Indeed search grid. Indeed caps a search at ~300 pages so splitting the queries up by state gets much better coverage
+# (see `scrape_sharded`, which can run e.g. all of `state_names` in parallel)
+indeed_states = ["United States"]
+indeed_jobs = ["Data Scientist", "Data Analyst", "Data Engineer"]
+# pulls the lower pay, optional upper pay (each with an optional thousands "K") and the pay period out of Indeed pay strings
+# e.g. "$120,000 - $150,000 a year", "$120K - $150K a year", "$45 an hour", "From $95,000 a year"
+pay_pattern = r"\$?([\d,]+(?:\.\d+)?)([kK])?(?:\s*[-–]\s*\$?([\d,]+(?:\.\d+)?)([kK])?)?(?:.*?\b(year|month|week|day|hour|hr)\b)?"
+# multipliers to turn a pay period into a yearly salary (40 hour weeks, 255 working days)
+pay_periods = {"year": 1, "month": 12, "week": 52, "day": 255, "hour": 40 * 52, "hr": 40 * 52}
+
+# JSON lines to main.log through a background thread, see scrape_logging.py
+setup_logging(LOG_PATH)
+
+
+def normalize_salaries(pay: pd.Series) -> pd.DataFrame:
+    """Turn a Series of raw pay strings into yearly salary_lower/salary_upper columns in one vectorized pass.
+
+    Strings without a pay period are only trusted if they look like a yearly salary (over $30,000), and then only the lower
+    number is kept. Anything we can't read comes back as NaN. Because the raw strings are stored in `salary_raw`, this can be
+    re-run over the whole history whenever the rules here change.
 
+    Keyword Arguments:
+    pay -- the raw pay strings, the result keeps the same index
+    """
+    parts = pay.astype("string").str.extract(pay_pattern)
+    lower = pd.to_numeric(parts[0].str.replace(",", ""), errors="coerce").to_numpy(dtype=float)
+    upper = pd.to_numeric(parts[2].str.replace(",", ""), errors="coerce").to_numpy(dtype=float)
+    # "$120K" is $120,000
+    lower = np.where(parts[1].notna(), lower * 1000, lower)
+    upper = np.where(parts[3].notna(), upper * 1000, upper)
+    mult = parts[4].map(pay_periods).to_numpy(dtype=float)
+
+    # no pay period, if it's big enough it's probably a yearly salary
+    no_period = np.isnan(mult)
+    mult = np.where(no_period & (lower > 30_000), 1.0, mult)
+    upper = np.where(no_period, np.nan, upper)
+
+    unparsed = pay.notna().to_numpy() & np.isnan(mult)
+    if unparsed.any():
+        logging.error(
+            "Pay error. not sure how to parse %s pay strings, e.g.: %s",
+            unparsed.sum(),
+            pay[unparsed].head(3).tolist(),
+        )
 
-def cleanhtml(html_string: str) -> str:
-    """Regex pattern to match and remove all html tags and comments, leaving plain text."""
-    html_string2 = re.sub("(<!--.*?-->)", "", html_string, flags=re.DOTALL)
-    cleaned_html = re.sub(
-        "<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});", " ", html_string2
+    return pd.DataFrame(
+        {"salary_lower": lower * mult, "salary_upper": upper * mult}, index=pay.index
     )
-    return cleaned_html
 
 
 def remove_style_tags(html_string: str) -> str:
@@ -219,17 +288,65 @@ def get_state_code(addr: str) -> str | None:
         states.remove("NE")
 
     if len(states) > 1:
-        print(f"too many states!!!: {addr} || {states}")
+        logging.warning("too many states!!!: %s || %s", addr, states)
     elif len(states) == 1:
         return states[0]
     else:
         return None
 
 
+def enrich_job_meta(job_meta: pd.DataFrame) -> pd.DataFrame:
+    """Derive the columns that come from our own parsing rules rather than straight from the job boards: state (from the
+    location), clean_title (from the title) and, where the raw pay string was kept, the yearly salaries. `clean_data` runs
+    this on every scrape and `reenrich.py` re-runs it over the stored history when these rules change.
+
+    Keyword Arguments:
+    job_meta -- job meta rows with at least the location and title columns
+    """
+    job_meta = job_meta.copy()
+    # let's clean up the data a bit
+    # I noticed that New York City, NY is just represented as New York City. This doesn't work for pulling out the states later so let's just replace it
+    job_meta["location"] = job_meta["location"].replace(
+        {"New York City": "New York City, NY"}
+    )
+    # Let's get the states (note, there are non-US jobs in this dataset)
+    job_meta["state"] = (
+        job_meta.loc[:, "location"].astype(object).fillna("").apply(get_state_code)
+    )
+    # let's clean up the job titles a bit based on some hard coded rules. This is not fool proof but it gives us a much better idea of what jobs are on this site.
+    job_meta["clean_title"] = job_meta["title"].apply(clean_title)
+    # finally, salaries we still have the raw pay string for are re-parsed with the current rules
+    if "salary_raw" in job_meta:
+        has_raw = job_meta["salary_raw"].notna().to_numpy()
+        if has_raw.any():
+            salaries = normalize_salaries(job_meta.loc[has_raw, "salary_raw"])
+            job_meta.loc[has_raw, "salary_lower"] = salaries["salary_lower"].to_numpy()
+            job_meta.loc[has_raw, "salary_upper"] = salaries["salary_upper"].to_numpy()
+    return enforce_job_meta_schema(job_meta)
+
+
+def start_driver():
+    """A new Chrome driver with the configured settings."""
+    return DriverBuilder().get_driver(
+        download_location=PATH, headless=HEADLESS, lean=LEAN_BROWSER
+    )
+
+
+def supervise(driver=None) -> DriverSupervisor:
+    """A supervisor (with the configured limits) for an already running driver, or a new one if none is given."""
+    return DriverSupervisor(
+        start_driver,
+        driver=driver,
+        recycle_pages=recycle_pages,
+        recycle_rss_mb=recycle_rss_mb,
+        watchdog_timeout=watchdog_timeout,
+    )
+
+
 class DataJobsScraper:
     """
-    Webscraping class capable of scraping information about data jobs posted to Indeed.com and DataJobs.com. The
-    scraper will pull:
+    Webscraping class capable of scraping information about data jobs posted to Indeed.com and DataJobs.com (or any other
+    site with a `SiteAdapter`, see site_adapters.py). The scraper will pull:
         1) Job Titles
         2) Companies
         3) Job Locations
@@ -237,13 +354,43 @@ class DataJobsScraper:
         5) Job Descriptions
     """
 
-    def __init__(self, site: str):
+    def __init__(
+        self,
+        site: str,
+        resume: bool = False,
+        queries: list[tuple[str, str]] | None = None,
+        driver=None,
+        shard: int | None = None,
+        run_id: str | None = None,
+        max_pages: int | None = None,
+        supervisor: DriverSupervisor | None = None,
+    ):
         """Initializes the scraper and sets up a few variables for the scraper.
 
         Keyword Arguments:
-        site -- the website URL
+        site -- the website to scrape, one of SITE_ADAPTERS ("DataJobs", "Indeed")
+        resume -- pick up from the last checkpoint of a crashed or interrupted run instead of starting over
+        queries -- (job title, location) pairs to search on Indeed, defaults to every combination of indeed_jobs and indeed_states
+        driver -- an already running selenium driver to use instead of starting a new one
+        shard -- the shard number when this scraper is one worker of a sharded run (keeps the checkpoints separate)
+        run_id -- the id to tag this run's logs and metrics with, workers of a sharded run get the parent's. A new one by default
+        max_pages -- the most pages of a board (or search) to go through, defaults to the configured max_pages
+        supervisor -- an already running DriverSupervisor to use (and share), instead of `driver`
         """
         self._site = site
+        self.run_id = start_run(site, run_id)
+        # the browser, restarted when it crashes or hangs (see driver_supervisor.py)
+        if supervisor is None and driver is not None:
+            supervisor = supervise(driver)
+        self._supervisor = supervisor
+        if queries is None:
+            queries = [(job, state) for state, job in product(indeed_states, indeed_jobs)]
+        self._queries = queries
+        self._max_pages = max_pages or MAX_PAGES
+
+        # everything site specific
+        self._adapter = SITE_ADAPTERS[site]()
+        self._site_url = self._adapter.site_url
 
         # the way this is set up, we only need to set up the job_meta dataframe initially.
         self.job_meta = pd.DataFrame(
@@ -258,461 +405,744 @@ class DataJobsScraper:
                 "site",
             ]
         )
+        self._job_desc_list = []
+        # details (company, location, pay) pulled off each posting (Indeed), merged into job_meta once at the end
+        self._posting_list = []
+        # per stage timings and counters for the run summary
+        self.metrics = ScrapeMetrics(site, run_id=self.run_id)
+        # how long to wait for the next page and for a posting's description, learned as the run goes
+        self._timeouts = {
+            "page_load": AdaptiveTimeout(wait_time),
+            "posting_load": AdaptiveTimeout(wait_time),
+            "desc": AdaptiveTimeout(wait_time),
+        }
+
+        # progress is checkpointed periodically so a failed run can be resumed
+        name = self._site if shard is None else f"{self._site}-shard{shard}"
+        self._checkpoint = ScrapeCheckpoint(
+            f"{PATH}/{name}_checkpoint.sqlite", interval=checkpoint_every
+        )
+        self._cursor = {}
+        if resume:
+            job_meta, records, self._cursor = self._checkpoint.load()
+            self._job_desc_list = records.get("descriptions", [])
+            self._posting_list = records.get("postings", [])
+            if job_meta is not None:
+                self.job_meta = enforce_job_meta_schema(job_meta)
+            logging.warning("Resuming %s run from checkpoint: %s", self._site, self._cursor)
+        else:
+            # a fresh run shouldn't pick up leftovers from an old one
+            self._checkpoint.clear()
+
+    @property
+    def _driver(self):
+        # the supervisor's current driver, it's a new one after every restart
+        return None if self._supervisor is None else self._supervisor.driver
 
     def scrape_jobs(self):
         """Controls the scraping of the high-level job data. Establishes a selenium driver and calls the scraping functions to search
         through pages of job postings."""
 
         # set up the Chrome Driver
-        driver_builder = DriverBuilder()
-        self._driver = driver_builder.get_driver(
-            download_location=PATH, headless=HEADLESS
-        )
+        if self._supervisor is None:
+            with self.metrics.stage("driver_start"):
+                self._supervisor = supervise()
 
-        if self._site == "DataJobs":
-            self._site_url = "https://datajobs.com/"
-            # there are two different boards on this website
-            self.__scrape_datajobs()
-        elif self._site == "Indeed":
-            self._site_url = "https://indeed.com/"
-            self.__scrape_indeed()
-
-        # just dedup jobs before moving on
-        self.job_meta.drop_duplicates(
-            subset=self.job_meta.columns.tolist()[:-1], inplace=True
-        )
+        # the job boards were already fully scraped before the last run died
+        if self._cursor.get("stage") in ("desc", "scraped"):
+            return
+
+        self._tabs = self.__tab_pool(prefetch_pages, "page_load")
+        try:
+            self.__scrape_boards()
+        finally:
+            self._tabs.close()
+
+        # just dedup jobs before moving on, same posting key export_data dedups on so we don't scrape a posting twice
+        with self.metrics.stage("dedup"):
+            dupes = duplicated_postings(self.job_meta)
+            if self._adapter.canonical_urls:
+                # one url per posting no matter which page or query it showed up on (Indeed job key urls)
+                dupes = dupes | self.job_meta["url"].duplicated().to_numpy()
+            self.job_meta = self.job_meta[~dupes].copy()
         # indexing the job id
         self.job_meta["job_id"] = self.job_meta.index + 1
 
         # pull date for tracking purposes
-        self.job_meta["pull_date"] = datetime.today().strftime(r"%m/%d/%Y")
+        self.job_meta["pull_date"] = pd.Timestamp(datetime.today().date())
+        self.job_meta = enforce_job_meta_schema(self.job_meta)
+
+        self.__checkpoint({"stage": "desc", "position": 0}, force=True)
+
+    def drop_exported(self, data_path: str) -> int:
+        """Incremental runs: drop the postings that are already exported to `data_path` from job_meta so only the new ones get
+        scraped. Call it between `scrape_jobs` and `scrape_job_text`. Returns the number of postings dropped."""
+        # a resumed run that's already into the postings keeps its job meta, the checkpoint positions point into it
+        if self._cursor.get("stage") != "desc" or self._cursor.get("position", 0):
+            return 0
+        with self.metrics.stage("dedup"):
+            seen = exported_postings(self.job_meta, data_path, self._site)
+            self.job_meta = self.job_meta[~seen].reset_index(drop=True)
+        self.job_meta["job_id"] = self.job_meta.index + 1
+        self.metrics.count("already_exported", int(seen.sum()))
+        self.__checkpoint({"stage": "desc", "position": 0}, force=True)
+        return int(seen.sum())
 
     def scrape_job_text(self):
         """Controls the scraping of the individual job postings including job descriptions."""
-        if self._site == "DataJobs":
-            job_desc_list = self.__scrape_datajob_desc()
-        elif self._site == "Indeed":
-            job_desc_list = self.__scrape_indeed_desc()
+        if self._cursor.get("stage") != "scraped":
+            self.__scrape_postings()
+            self.__checkpoint({"stage": "scraped"}, force=True)
 
         # set up the dataframe
-        self.job_descriptions = pd.DataFrame(job_desc_list)
+        self.job_descriptions = enforce_job_descriptions_schema(
+            pd.DataFrame(self._job_desc_list, columns=["job_id", "title", "company", "desc"])
+        )
 
     def clean_data(self):
         """Clean up a couple things, grab state codes and clean up the job titles where we can."""
-        # let's clean up the data a bit
-        # I noticed that New York City, NY is just represented as New York City. This doesn't work for pulling out the states later so let's just replace it
-        self.job_meta.location = self.job_meta.location.replace(
-            {"New York City": "New York City, NY"}
-        )
-        # Let's get the states (note, there are non-US jobs in this dataset)
-        self.job_meta["state"] = (
-            self.job_meta.loc[:, "location"]
-            .fillna("")
-            .apply(lambda x: get_state_code(x))
-        )
-        # finally, let's clean up the job titles a bit based on some hard coded rules. This is not fool proof but it gives us a much better idea of what jobs are on this site.
-        self.job_meta["clean_title"] = self.job_meta["title"].apply(clean_title)
+        with self.metrics.stage("clean"):
+            self.job_meta = enrich_job_meta(self.job_meta)
 
     def export_data(self, data_path):
         """export the scraped data to csv files. This function will append onto existing data and update job_ids"""
-        self._driver.close()
-        try:
-            # grab old data
-            old_jm = pd.read_csv(f"{data_path}/{self._site}_job-meta.csv")
-            old_jd = pd.read_csv(f"{data_path}/{self._site}_job-descriptions.csv")
-        except:
+        # sharded runs merge their results into a scraper that never started a browser
+        if self._supervisor is not None:
+            self._supervisor.quit()
+        with self.metrics.stage("export"):
+            self.__export_csv(data_path)
+
+        # everything is safely exported, the checkpoint isn't needed anymore
+        self._checkpoint.clear()
+        # and write the run summary next to main.log
+        self.metrics.write(LOG_PATH)
+
+    def __write_csv(self, data_path, job_meta, job_descriptions, versions=None):
+        # write the csv files crash safe: temp files first, then the manifest, then the swap (see export_files.py). the old
+        # versions of edited descriptions only get rewritten when there are new ones
+        write_csv_tmp(
+            job_meta,
+            f"{data_path}/{self._site}_job-meta.csv",
+            date_format=PULL_DATE_FORMAT,
+        )
+        write_csv_tmp(
+            job_descriptions, f"{data_path}/{self._site}_job-descriptions.csv"
+        )
+        rows = {"job-meta": len(job_meta), "job-descriptions": len(job_descriptions)}
+        if versions is not None:
+            write_csv_tmp(
+                versions, f"{data_path}/{self._site}_job-description-versions.csv"
+            )
+            rows["job-description-versions"] = len(versions)
+        commit_export(data_path, self._site, rows)
+
+    def __export_csv(self, data_path):
+        # append the new data onto the existing csv files
+        index_path = f"{data_path}/{self._site}_posting-index.npz"
+        desc_index_path = f"{data_path}/{self._site}_desc-index.npz"
+        # every stored description is the first version of its text, until the posting gets edited
+        self.job_descriptions["version"] = 1
+        self.job_descriptions = enforce_job_descriptions_schema(self.job_descriptions)
+        # checks the old files against the export manifest first. A file that doesn't match raises, it's never taken for a
+        # first run (which would overwrite the history)
+        if not verify_export(data_path, self._site):
             # this is the first run so just export
-            self.job_meta.to_csv(f"{data_path}/{self._site}_job-meta.csv", index=False)
-            self.job_descriptions.to_csv(
-                f"{data_path}/{self._site}_job-descriptions.csv", index=False
+            self.__write_csv(data_path, self.job_meta, self.job_descriptions)
+            PostingIndex.build(index_path, self.job_meta).save()
+            keys, found = description_keys(
+                self.job_meta, posting_keys(self.job_meta), self.job_descriptions
             )
+            DescriptionIndex.build(
+                desc_index_path,
+                keys[found],
+                self.job_descriptions[found],
+                simhash=simhash_distance > 0,
+            ).save()
+            if storage == "arrow":
+                write_job_store(data_path, self._site, self.job_meta, self.job_descriptions)
+            aggregates = AnalyticsAggregates(data_path, self._site)
+            aggregates.rebuild(self.job_meta, self.job_descriptions)
+            aggregates.save()
         else:
-            # set the new indexes
-            self.job_meta["job_id"] = self.job_meta["job_id"] + old_jm["job_id"].max()
-            self.job_descriptions["job_id"] = (
-                self.job_descriptions["job_id"] + old_jd["job_id"].max()
+            # grab old data
+            old_jm = read_job_meta(f"{data_path}/{self._site}_job-meta.csv")
+            old_jd = read_job_descriptions(
+                f"{data_path}/{self._site}_job-descriptions.csv"
             )
 
-            # drop duplicate jobs
-            comb_jm = pd.concat(
-                [old_jm, self.job_meta], ignore_index=True
-            ).drop_duplicates(
-                subset=["url", "title", "company", "location"],
-                keep="first",
-                ignore_index=True,
+            # set the new indexes. the descriptions move by the same offset as the job meta rows, so they stay with their
+            # postings (not every posting has a description, the old files' highest job_ids can differ)
+            offset = old_jm["job_id"].max()
+            self.job_meta["job_id"] = self.job_meta["job_id"] + offset
+            self.job_descriptions["job_id"] = self.job_descriptions["job_id"] + offset
+
+            # drop duplicate jobs. only the new rows get hashed and probed against the index of everything exported so far
+            index = PostingIndex(index_path)
+            if index.n_rows != len(old_jm):
+                # first run with an index (or the csv was edited by hand), build it from the history once
+                index = PostingIndex.build(index_path, old_jm)
+            new_keys = posting_keys(self.job_meta)
+            is_new = ~index.contains(new_keys) & ~pd.Series(new_keys).duplicated().to_numpy()
+            comb_jm = pd.concat([old_jm, self.job_meta[is_new]], ignore_index=True)
+            index.add(new_keys[is_new])
+
+            # descriptions. the new postings' go in, the re-visited postings' are checked against the fingerprints of the
+            # stored ones: unchanged ones are dropped, edited ones replace the stored text as its next version, and the ones of
+            # postings that never had a description stored go in as its first version
+            desc_index = DescriptionIndex(desc_index_path)
+            if desc_index.n_rows != len(old_jd):
+                # first run with an index (or the csv was edited by hand), build it from the history once
+                keys, found = description_keys(old_jm, posting_keys(old_jm), old_jd)
+                desc_index = DescriptionIndex.build(
+                    desc_index_path, keys[found], old_jd[found], simhash=simhash_distance > 0
+                )
+            desc_keys, _ = description_keys(self.job_meta, new_keys, self.job_descriptions)
+            is_new_desc = self.job_descriptions["job_id"].isin(self.job_meta.loc[is_new, "job_id"]).to_numpy()
+            revisits = self.job_descriptions[~is_new_desc]
+            revisit_keys = desc_keys[~is_new_desc]
+            with self.metrics.stage("desc_fingerprint"):
+                found, changed = desc_index.changed(revisit_keys, revisits["desc"], simhash_distance)
+            # the edited postings keep their stored job_id
+            _, pos = desc_index.lookup(revisit_keys[changed])
+            edits = revisits[changed].assign(
+                job_id=desc_index.job_ids[pos], version=desc_index.versions[pos] + 1
             )
-            # drop duplicate descriptions. 
-            # NOTE: This logic will prevent keeping jobs where the poster edited the job posting text
-            comb_jd = pd.concat([old_jd, self.job_descriptions], ignore_index=True)
+            last = ~edits["job_id"].duplicated(keep="last").to_numpy()
+            edits, edit_keys = edits[last], revisit_keys[changed][last]
+            # a posting without a stored description (it didn't load on the first visit) gets this one under its stored job_id.
+            # only the stored rows with one of the re-visited urls get hashed to find it
+            missing = ~found
+            fills, fill_keys = revisits[:0].assign(version=1), revisit_keys[:0]
+            if missing.any():
+                stored = old_jm[old_jm["url"].isin(self.job_meta.loc[~is_new, "url"])]
+                stored_keys = pd.Index(posting_keys(stored))
+                first = ~stored_keys.duplicated()
+                pos = stored_keys[first].get_indexer(revisit_keys[missing])
+                exported = pos >= 0
+                fills = revisits[missing][exported].assign(
+                    job_id=stored["job_id"].to_numpy()[first][pos[exported]], version=1
+                )
+                last = ~fills["job_id"].duplicated(keep="last").to_numpy()
+                fills, fill_keys = fills[last], revisit_keys[missing][exported][last]
+            self.metrics.count("desc_unchanged", int((found & ~changed).sum()))
+            self.metrics.count("desc_changed", len(edits))
+            self.metrics.count("desc_added", len(fills))
+
+            if "version" not in old_jd:
+                # exported before there were versions
+                old_jd["version"] = 1
+            old_jd = enforce_job_descriptions_schema(old_jd)
+            versions = None
+            # the stored texts the edits replace
+            replaced = old_jd[:0]
+            if len(edits):
+                # the old text moves to the versions file and the new one takes its place (same job_id, same row)
+                edited = old_jd["job_id"].isin(edits["job_id"]).to_numpy()
+                replaced = old_jd[edited]
+                versions_path = f"{data_path}/{self._site}_job-description-versions.csv"
+                old_versions = (
+                    read_job_descriptions(versions_path)
+                    if os.path.exists(versions_path)
+                    else None
+                )
+                versions = enforce_job_descriptions_schema(
+                    pd.concat([old_versions, replaced], ignore_index=True)
+                )
+                replacement = edits.set_index("job_id").loc[old_jd.loc[edited, "job_id"]]
+                for col in ["title", "company", "desc", "version"]:
+                    old_jd.loc[edited, col] = replacement[col].to_numpy()
+            comb_jd = pd.concat([old_jd, self.job_descriptions[is_new_desc], fills], ignore_index=True)
             comb_jd = comb_jd[comb_jd["job_id"].isin(list(comb_jm["job_id"].values))]
 
-            # finally, export
-            comb_jm.to_csv(f"{data_path}/{self._site}_job-meta.csv", index=False)
-            comb_jd.to_csv(
-                f"{data_path}/{self._site}_job-descriptions.csv", index=False
-            )
+            # the concat drops the categoricals whose categories don't match, put the schema back before writing
+            comb_jm = enforce_job_meta_schema(comb_jm)
+            comb_jd = enforce_job_descriptions_schema(comb_jd)
 
-    def __scrape_datajobs(self) -> pd.DataFrame:
-        # scrape job meta information (title, company, salary, job_posting_url, etc) from DataJobs.com.
-        # Data Jobs has two endpoints for Data Science/Analytics jobs and Data Engineering Jobs
-        board_paths = ["/Data-Science-Jobs", "/Data-Engineering-Jobs"]
-        # loop through the boards available
-        for bp in board_paths:
-            if bp == "/Data-Science-Jobs":
-                cat = "Data Science & Analytics"
+            # finally, export
+            self.__write_csv(data_path, comb_jm, comb_jd, versions)
+            index.save()
+            new_jd = self.job_descriptions[is_new_desc]
+            for keys, descs in [(desc_keys[is_new_desc], new_jd), (edit_keys, edits), (fill_keys, fills)]:
+                desc_index.set(
+                    keys,
+                    descs["desc"],
+                    descs["job_id"].to_numpy(dtype=np.int64),
+                    descs["version"].to_numpy(dtype=np.int64),
+                    simhash=simhash_distance > 0,
+                )
+            desc_index.n_rows = len(comb_jd)
+            desc_index.save()
+            # and the memory mapped copy the notebook reads (see job_store.py)
+            if storage == "arrow":
+                write_job_store(data_path, self._site, comb_jm, comb_jd)
+
+            # fold only the newly exported rows into the notebook aggregates. descriptions stored for rows that are already in
+            # there (edited ones, and ones that were missing) only change the keyword totals of those rows
+            aggregates = AnalyticsAggregates(data_path, self._site)
+            if aggregates.n_rows != len(old_jm):
+                aggregates.rebuild(comb_jm, comb_jd)
             else:
-                cat = "Data Engineering"
-            # load into the webpage
-            self._driver.get(self._site_url + bp)
-            more_pages = True  # will kill the loop when there are no more pages
-            i = 0  # just a counter to kill the loop just in case
-            while more_pages:
-                # grab page source html
-                page_html = self._driver.page_source
-
-                # grab job info
-                fall = re.findall(dj_pattern, page_html)
-                
-                # zip the info into a dict for easy DataFrame-ability
-                fall_cols = [
-                    dict(
-                        zip(
-                            self.job_meta.columns,
-                            (
-                                (
-                                    y.replace("&amp;", "&") # this removes some HTML stuff to not confuse the CSV format
-                                    .replace("&amp,", "&")
-                                    .replace("&nbsp;", " ")
-                                    .replace("&nbsp,", " ")
-                                    if type(y) == str
-                                    else y
-                                )
-                                for y in x
-                            )
-                            + (cat,),
-                        )
-                    )
-                    for x in fall
-                ]
-                # add to dataframe
-                self.job_meta = pd.concat(
-                    [self.job_meta, pd.DataFrame(fall_cols)], ignore_index=True
+                new_jm = self.job_meta[is_new]
+                aggregates.update(
+                    new_jm,
+                    self.job_descriptions[
+                        self.job_descriptions["job_id"].isin(new_jm["job_id"])
+                    ],
                 )
-
-                if i == 300:
-                    # stop after 300 pages
-                    more_pages = False
-
-                # try to go to next page
-                try:
-                    next_page = WebDriverWait(self._driver, wait_time).until(
-                        EC.element_to_be_clickable(
-                            (By.XPATH, "//a[contains(text(), 'NEXT PAGE')]")
-                        )
-                    )
-                    next_page.click()
-                    i += 1
-                except:
-                    logging.info(f"END OF SEARCH RESULTS: {self._site_url} || {bp}")
-                    more_pages = False
-
-        # finally just log the site we are scraping from
-        self.job_meta["site"] = self._site_url
-
-    def __scrape_datajob_desc(self) -> list:
-        # scrape the job description from the job posting
-
-        # list to hold description text
-        job_desc_list = []
-        for _, job in self.job_meta.iterrows():
-            # set up the URL so the driver can navigate there
-            job_url = self._site_url + job["url"][1:]
-            # navigate to the job posting
-            self._driver.get(job_url)
-            # grab job desc element
-            try:
-                job_descr = WebDriverWait(self._driver, wait_time).until(
-                    EC.element_to_be_clickable(
-                        (
-                            By.XPATH,
-                            "//div[@id='job_description']//*[@class='jobpost-table-cell-2']",
-                        )
+                stored = pd.concat([edits, fills], ignore_index=True)
+                if len(stored):
+                    aggregates.update_keywords(
+                        old_jm[old_jm["job_id"].isin(stored["job_id"])], stored, replaced
                     )
+            aggregates.save()
+
+    def __checkpoint(self, cursor: dict, force: bool = False):
+        # save progress if enough time has passed since the last checkpoint (or if forced)
+        self._cursor = cursor
+        if force or self._checkpoint.due():
+            with self.metrics.stage("checkpoint"):
+                self._checkpoint.save(
+                    self.job_meta,
+                    {
+                        "descriptions": self._job_desc_list,
+                        "postings": self._posting_list,
+                    },
+                    cursor,
+                    force=True,
                 )
-            except:
-                logging.error(f"I can't find this job: {job['title']} || {self._site_url}")
-                continue
-
-            # get html
-            job_desc_clean = (
-                cleanhtml(job_descr.get_attribute("innerHTML"))
-                .replace("&amp;", "&") # this removes some HTML stuff to not confuse the CSV format
-                .replace("&amp,", "&")
-                .replace("&nbsp;", " ")
-                .replace("&nbsp,", " ")
-            )
-            job_desc_list.append(
-                {
-                    "job_id": job["job_id"],
-                    "title": job["title"],
-                    "company": job["company"],
-                    "desc": job_desc_clean,
-                }
-            )
-        return job_desc_list
-
-    def __scrape_indeed(self) -> pd.DataFrame:
-        # scrape indeed for data jobs. Indeed has many more jobs than DataJobs so we run into the page limitation more often
-
-        # to not have bias in my viz toward one state, I just grab the top jobs in all states
-        states = ["United States"]
-        jobs = ["Data Scientist", "Data Analyst", "Data Engineer"]
-
-        for state in states:
-            for job in jobs:
 
-                # this is rate limiting to limit the "are you a human?" Issue.
-                # NOTE: Indeed does allow scraping, check the robots.txt
-                time.sleep(np.random.randint(1, 10) / 10)
+    def __resume_board(self, board: str, start_url: str) -> tuple[int, str]:
+        # the page counter and url to start the board from: the first page, or the checkpointed page if we're resuming this board
+        if self._cursor.get("current") == board and self._cursor.get("url"):
+            return self._cursor["page"], self._cursor["url"]
+        return 0, start_url
 
-                # set up webspage URL
-                bp = f"jobs?q={job.lower().replace(' ','+')}&l={state}"
-                # navigate to webpage
-                self._driver.get(self._site_url + bp)
-
-                more_pages = True  # will kill the loop when there are no more pages
-                i = 0  # just a counter to kill the loop just in case
-                while more_pages:
+    def __tab_pool(self, size: int, timeout: str):
+        # background tabs in the current browser, timed with one of the adaptive timeouts
+        return DriverBuilder().get_tab_pool(
+            size, driver=self._driver, timeout=self._timeouts[timeout]
+        )
 
-                    # grab page source html
-                    page_html = self._driver.page_source
+    def __recover_driver(self) -> bool:
+        # after a driver call failed: True if the browser had died and was restarted, False if it's fine (the page just didn't
+        # load). anything tied to the old browser (tabs) is gone after a restart
+        if not self._supervisor.recover():
+            return False
+        self.metrics.count("driver_restart")
+        return True
+
+    def __page_done(self) -> bool:
+        # count a handled page, True if the browser was recycled (restarted) because of its age or size
+        if not self._supervisor.page_done():
+            return False
+        self.metrics.count("driver_recycle")
+        return True
+
+    def __get_board_page(self, url: str) -> str | None:
+        # the html of a job board page, from the tab it was prefetched in (or loaded now if it wasn't). None if it didn't load.
+        # if the browser crashes or hangs on it, it's restarted and the page is tried again
+        for _ in range(driver_retries + 1):
+            try:
+                with self._supervisor.watch():
+                    with self.metrics.stage("page_get"):
+                        self._tabs.open(url)
+                    with self.metrics.stage("page_source"):
+                        page_html = self._driver.page_source
+                    self._tabs.release()
+                    return page_html
+            except SESSION_ERRORS:
+                if not self.__recover_driver():
+                    logging.warning("Page didn't load: %s", url)
+                    self.metrics.count("timeout.page")
+                    self._tabs.release()
+                    return None
+            # the prefetching tabs went with the old browser
+            self._tabs = self.__tab_pool(prefetch_pages, "page_load")
+        logging.warning("Giving up on a page after %d browser restarts: %s", driver_retries, url)
+        self.metrics.count("driver_gave_up")
+        return None
 
-                    # scrape job titles
-                    titles = re.findall(
-                        "<span[^>]*jobTitle[^>]*>(?<=>)(.*?)(?=<)", page_html
-                    )
+    def __prefetch(self, urls: list):
+        # start loading the next pages in the background tabs. it's only a head start, if the browser dies here the pages are
+        # loaded when they're opened
+        try:
+            with self._supervisor.watch():
+                for url in urls:
+                    self._tabs.load(url)
+        except SESSION_ERRORS:
+            if not self.__recover_driver():
+                raise
+            self._tabs = self.__tab_pool(prefetch_pages, "page_load")
+
+    def __pause(self, delay: tuple | None):
+        # rate limiting, a random pause in the (low, high) range of seconds. this is to limit the "are you a human?" Issue
+        if delay is not None and delay_scale > 0:
+            with self.metrics.stage("rate_limit"):
+                time.sleep(np.random.uniform(*delay) * delay_scale)
+
+    def __scrape_boards(self):
+        # scrape job meta information (title, company, salary, job_posting_url, etc) from every board (or search) of the site.
+        # the next pages of a board load in the background while the current one is parsed
+
+        # boards that were finished before a resumed run died
+        done = self._cursor.get("done", [])
+        max_pages = self._max_pages
+        for board, category, board_url in self._adapter.boards(self._queries):
+            if board in done:
+                continue
+            self.__pause(self._adapter.board_delay)
 
-                    # scrape job links
-                    links = re.findall(
-                        '<h2[^>]*jobTitle[^>]*><a[^>]*href="([^">]*)">', page_html
-                    )
+            # start from the first page (or the checkpointed page of it)
+            i, page_url = self.__resume_board(board, board_url)
+            more_pages = True  # will kill the loop when there are no more pages
+            while more_pages:
+                page_start = time.perf_counter()
+                # grab page source html
+                page_html = self.__get_board_page(page_url)
+                if page_html is None:
+                    break
+
+                # the next pages start loading in the background while this one is parsed. no next page link, no next pages.
+                # `i` counts from 0, so this is page i + 1 of at most max_pages
+                next_urls = self._adapter.next_page_urls(
+                    page_html, board_url, page_url, i, prefetch_pages
+                )
+                self.__prefetch(next_urls[: max_pages - i - 1])
 
-                    # this ensures we can travel to the scraped link
-                    clean_links = self.__clean_indeed_link(links=links)
-
-                    # this is just in order to get it into the same format as the DataJobs scraper
-                    nan_list = [np.nan for idx in range(len(titles))]
-                    job_cats = [job for idx in range(len(titles))]
-                    fall = list(
-                        zip(
-                            clean_links,
-                            titles,
-                            nan_list,
-                            nan_list,
-                            nan_list,
-                            nan_list,
-                            job_cats,
-                        )
+                with self.metrics.stage("parse"):
+                    rows = self._adapter.parse_board(page_html, category)
+                # add to dataframe
+                with self.metrics.stage("concat"):
+                    self.job_meta = pd.concat(
+                        [self.job_meta, pd.DataFrame(rows)], ignore_index=True
                     )
+                self.metrics.page(board, i, time.perf_counter() - page_start, len(rows))
 
-                    # create pandasable list
-                    fall_cols = [
-                        dict(
-                            zip(
-                                self.job_meta.columns,
-                                [
-                                    (
-                                        y.replace("&amp;", "&")
-                                        .replace("&amp,", "&")
-                                        .replace("&nbsp;", " ")
-                                        .replace("&nbsp,", " ")
-                                        if type(y) == str
-                                        else y
-                                    )
-                                    for y in x
-                                ],
-                            )
-                        )
-                        for x in fall
-                    ]
-
-                    # add to dataframe
-                    self.job_meta = pd.concat(
-                        [self.job_meta, pd.DataFrame(fall_cols)], ignore_index=True
+                if i + 1 >= max_pages:
+                    logging.warning("Ran into page limitation || %s || %s", self._site_url, board)
+                    more_pages = False
+                elif not next_urls:
+                    # no next page link, this was the last page
+                    logging.info("END OF SEARCH RESULTS: %s || %s", self._site_url, board)
+                    self.metrics.count("end_of_results")
+                    more_pages = False
+                else:
+                    # go to next page
+                    i += 1
+                    page_url = next_urls[0]
+                    self.__checkpoint(
+                        {
+                            "stage": "jobs",
+                            "done": done,
+                            "current": board,
+                            "page": i,
+                            "url": page_url,
+                        }
                     )
+                if self.__page_done():
+                    # the prefetched pages went with the old browser, they're loaded again when they're opened
+                    self._tabs = self.__tab_pool(prefetch_pages, "page_load")
+            # drop whatever was prefetched past the last page
+            self._tabs.cancel()
+            done = done + [board]
+            self.__checkpoint({"stage": "jobs", "done": done}, force=True)
 
-                    if i == 300:
-                        logging.warning(f"Ran into page limitation || {self._site_url} || {job} || {state}")
-                        # stop after 200 pages
-                        more_pages = False
-
-                    # try to go to next page
-                    try:
-                        next_page = WebDriverWait(self._driver, wait_time).until(
-                            EC.element_to_be_clickable(
-                                (
-                                    By.XPATH,
-                                    "//a[contains(@data-testid, 'pagination-page-next')]",
-                                )
-                            )
-                        )
-                        next_page.click()
-                        i += 1
-                    except:
-                        logging.info(f"END OF SEARCH RESULTS: {self._site_url} || {job} || {state}")
-                        more_pages = False
-            self.job_meta["site"] = self._site_url
-
-    def __scrape_indeed_desc(self) -> list:
-        # similar to the DataJobs description scraper, navigate to the job posting and scrape info from it.
-        # this part contains most of the information about the job because the Regex's are simpler on this page
-
-        job_desc_list = []
-        for idx, job in self.job_meta.iterrows():
-            # this is rate limiting to limit the "are you a human?" Issue.
-            # NOTE: Indeed does allow scraping, check the robots.txt
-            time.sleep(np.random.randint(1, 15) / 10)
-
-            # for indeed jobs we store the full url here
-            self._driver.get(job["url"])
-
-            # get the source html
-            page_html = self._driver.page_source
-            # strip out the script and styling
-            page_html = remove_script_tags(page_html)
-            page_html = remove_style_tags(page_html)
-
-            # grab company name
-            company_name = re.findall(
-                r"data-company-name[^>]*><span[^>]*><a[^>]*>([^<]*)<", page_html
-            )
+        # finally just log the site we are scraping from
+        self.job_meta["site"] = self._site_url
 
-            if len(company_name) == 1:
-                self.job_meta.loc[idx, "company"] = (
-                    company_name[0]
-                    .replace("&amp;", "&")
-                    .replace("&amp,", "&")
-                    .replace("&nbsp;", " ")
-                    .replace("&nbsp,", " ")
+    def __open_postings(self, jobs: pd.DataFrame):
+        # yields (position, job) for every job in `jobs` with the driver on the job's posting. the postings load `posting_tabs`
+        # at a time in tabs of the one browser, and whichever finished loading first is handled first.
+        # the checkpoint keeps the first posting not handled yet, plus the (few) ones after it that were already handled.
+        # if the browser dies (here or while the posting is handled) it's restarted, and the postings that were loading go back
+        # in line. the one in hand is tried again, `driver_retries` times
+
+        # postings handled before a resumed run died
+        start = self._cursor.get("position", 0)
+        handled = set(self._cursor.get("handled", []))
+        todo = deque(
+            (pos, job)
+            for pos, job in enumerate(jobs.itertuples(index=False))
+            if pos >= start and pos not in handled
+        )
+        # position -> (url, job) of the postings loading in the tabs. jobs can share a posting url, a url that's already loading
+        # only takes one tab, the other jobs with it get it loaded again in the main tab
+        loading = {}
+        # position -> browser restarts while it was in hand
+        restarts = {}
+        tabs = self.__tab_pool(posting_tabs, "posting_load")
+        try:
+            while todo or loading:
+                generation = self._supervisor.generation
+                in_hand = None
+                try:
+                    with self._supervisor.watch():
+                        # keep every tab busy
+                        while todo and tabs.idle():
+                            pos, job = todo.popleft()
+                            self.__pause(self._adapter.posting_delay)
+                            url = self._adapter.posting_url(job)
+                            tabs.load(url)
+                            loading[pos] = (url, job)
+
+                        if loading:
+                            # a posting whose url isn't loading in a tab (anymore) first, then one that's done loading if there
+                            # is one, otherwise the one that's been loading the longest
+                            in_tabs = tabs.loading()
+                            left_over = [p for p, (u, _) in loading.items() if u not in in_tabs]
+                            if left_over:
+                                pos = min(left_over)
+                            else:
+                                ready = tabs.ready()
+                                url = ready[0] if ready else in_tabs[0]
+                                pos = min(p for p, (u, _) in loading.items() if u == url)
+                            url, job = loading.pop(pos)
+                            in_hand = (pos, job)
+                        else:
+                            # no tabs (posting_tabs = 0), it's loaded in the main tab
+                            in_hand = todo.popleft()
+                            self.__pause(self._adapter.posting_delay)
+                            url = self._adapter.posting_url(in_hand[1])
+
+                        with self.metrics.stage("posting_get"):
+                            tabs.open(url)
+                        yield in_hand
+                        if self._supervisor.generation == generation:
+                            tabs.release()
+                except SESSION_ERRORS:
+                    if not self.__recover_driver():
+                        if in_hand is None:
+                            raise
+                        logging.warning("Posting didn't load: %s", url)
+                        self.metrics.count("timeout.posting")
+                        tabs.release()
+
+                if self._supervisor.generation != generation:
+                    # the tabs went with the old browser
+                    tabs = self.__tab_pool(posting_tabs, "posting_load")
+                    retry = [(pos, job) for pos, (_, job) in sorted(loading.items())]
+                    loading.clear()
+                    if in_hand is not None:
+                        pos = in_hand[0]
+                        restarts[pos] = restarts.get(pos, 0) + 1
+                        if restarts[pos] <= driver_retries:
+                            retry.insert(0, in_hand)
+                            in_hand = None
+                        else:
+                            logging.warning("Giving up on a posting after %d browser restarts: %s", driver_retries, url)
+                            self.metrics.count("driver_gave_up")
+                    todo.extendleft(reversed(retry))
+                    if in_hand is None:
+                        continue
+
+                handled.add(in_hand[0])
+                first = min(
+                    list(loading) + ([todo[0][0]] if todo else []),
+                    default=len(jobs),
                 )
-            else:
-                logging.warning(
-                    f"Not the correct number of company names for ID:{job['job_id']} TITLE: {job['title']}. Found: {company_name}"
+                handled = {p for p in handled if p > first}
+                self.__checkpoint(
+                    {"stage": "desc", "position": first, "handled": sorted(handled)}
                 )
-                company_name = [""]
+                if self.__page_done():
+                    # the postings loading in the old browser's tabs start over in the new one
+                    tabs = self.__tab_pool(posting_tabs, "posting_load")
+                    todo.extendleft(reversed([(pos, job) for pos, (_, job) in sorted(loading.items())]))
+                    loading.clear()
+        finally:
+            if self._supervisor.alive():
+                tabs.close()
+
+    def __scrape_postings(self):
+        # navigate to every job posting and pull the description (and whatever else the site only has there) off it with the
+        # site's extractor. the details are merged into job_meta at the end
+        for pos, job in self.__open_postings(
+            self.job_meta[["job_id", "url", "title", "company"]]
+        ):
+            # grab everything in one go, once the description is there
+            try:
+                with self.metrics.stage("desc_wait"):
+                    extracted = wait_for_script(
+                        self._driver,
+                        self._adapter.posting_js,
+                        description_loaded,
+                        self._timeouts["desc"],
+                    )
+            except SESSION_ERRORS:
+                if self.__recover_driver():
+                    # the browser died on this posting, __open_postings tries it again in the new one
+                    continue
+                extracted = None
+            if extracted is None:
+                logging.warning("I can't find this job: %s || %s", job.title, self._site_url)
+                self.metrics.count("timeout.desc")
+                continue
 
-            # grab salary
-            pay = re.findall(
-                r"salaryInfoAndJobType[^>]*><span[^>]*>([^<]*)<", page_html
-            )
+            with self.metrics.stage("posting_parse"):
+                details, description = self._adapter.parse_posting(job, extracted)
+            if details is not None:
+                self._posting_list.append(details)
+            if description is None:
+                logging.warning("I can't find this job: %s || %s", job.title, self._site_url)
+                self.metrics.count("timeout.desc")
+                continue
+            self.metrics.count("postings")
+            self._job_desc_list.append(description)
+
+        with self.metrics.stage("merge_postings"):
+            self.__merge_postings()
+
+    def __merge_postings(self):
+        # join the posting details onto job_meta in one go, keyed on job_id. the salaries are normalized on the way in
+        if not self._posting_list:
+            return
+        postings = pd.DataFrame(
+            self._posting_list, columns=["job_id", "company", "location", "salary_raw"]
+        ).drop_duplicates(subset="job_id", keep="last")
+        postings[["salary_lower", "salary_upper"]] = normalize_salaries(
+            postings["salary_raw"]
+        )
 
-            if len(pay) == 1:
-                # makes sure there are numbers in the string and that it isn't empty
-                if pay[0].strip() != "" and re.findall(r"\d", pay[0]):
-                    pay_range = self.__pay_handler(pay[0])
-                    try:
-                        self.job_meta.loc[idx, "salary_lower"] = pay_range[0]
-                        self.job_meta.loc[idx, "salary_upper"] = pay_range[1]
-                    except:
-                        self.job_meta.loc[idx, "salary_lower"] = pay_range[0]
-            else:
-                logging.warning(
-                    f"Not the correct number of salaries for ID:{job['job_id']} TITLE: {job['title']} Found: {pay}"
-                )
+        columns = self.job_meta.columns.tolist()
+        columns += [c for c in postings.columns if c not in columns]
+        merged = self.job_meta.drop(
+            columns=postings.columns.drop("job_id"), errors="ignore"
+        ).merge(postings, on="job_id", how="left")
+        # a left merge keeps the row order, so the old index (and everything keyed on it) still lines up
+        merged.index = self.job_meta.index
+        self.job_meta = enforce_job_meta_schema(merged[columns])
+
+
+def exported_postings(job_meta: pd.DataFrame, data_path: str, site: str) -> np.ndarray:
+    """Boolean mask of the job_meta rows whose posting is already exported to `data_path`."""
+    meta_path = f"{data_path}/{site}_job-meta.csv"
+    if not os.path.exists(meta_path):
+        return np.zeros(len(job_meta), dtype=bool)
+    if SITE_ADAPTERS[site].canonical_urls:
+        # the posting key has the company and location, which Indeed only shows on the posting itself. the url is enough
+        exported = pd.read_csv(meta_path, usecols=["url"])["url"]
+        return job_meta["url"].isin(exported).to_numpy()
+    # the index holds the keys of the exported rows, which went through clean_data (it fills in e.g. New York City's state)
+    index = PostingIndex(f"{data_path}/{site}_posting-index.npz")
+    return index.contains(posting_keys(enrich_job_meta(job_meta)))
+
+
+# each worker process of a sharded run keeps one (supervised) browser open for all of its tasks
+_shard_supervisor = None
+
+
+def _init_shard_worker():
+    """Process pool initializer, starts this worker's own Chrome driver."""
+    global _shard_supervisor
+    init_worker_logging()
+    _shard_supervisor = supervise()
+    # multiprocessing finalizers run when the worker process exits (atexit handlers don't)
+    Finalize(None, _shard_supervisor.quit, exitpriority=10)
+
+
+def _scrape_board_shard(
+    site: str, shard: int, queries: list, run_id: str, max_pages: int | None
+) -> tuple[pd.DataFrame, ScrapeMetrics]:
+    """Scrape the job boards for a slice of the (job title, location) grid."""
+    scraper = DataJobsScraper(
+        site,
+        queries=queries,
+        supervisor=_shard_supervisor,
+        shard=shard,
+        run_id=run_id,
+        max_pages=max_pages,
+    )
+    scraper.scrape_jobs()
+    scraper._checkpoint.clear()
+    return scraper.job_meta, scraper.metrics
 
-            # grab location
-            location = re.findall(
-                r"jobLocationText[^>]*><div[^>]*><span[^>]*>([^<]*)<", page_html
-            )
-            # NOTE: There are two different patterns I've found here
-            if not location:
-                location = re.findall(r"job-location[^>]*>([^<]*)</div", page_html)
-
-            if len(location) in (1,2):
-                self.job_meta.loc[idx, "location"] = (
-                    location[0]
-                    .replace("&amp;", "&")
-                    .replace("&amp,", "&")
-                    .replace("&nbsp;", " ")
-                    .replace("&nbsp,", " ")
-                )
-            else:
-                logging.warning(
-                    f"Not the correct number of locations for ID:{job['job_id']} TITLE: {job['title']}. Found: {location}"
-                )
 
-            # grab job description
-            try:
-                job_descr = WebDriverWait(self._driver, wait_time).until(
-                    EC.element_to_be_clickable((By.ID, "jobDescriptionText"))
-                )
-            except:
-                logging.warning(f"I can't find this job: {job['title']}")
-                continue
+def _scrape_desc_shard(
+    site: str, shard: int, job_meta: pd.DataFrame, run_id: str
+) -> tuple[pd.DataFrame, pd.DataFrame, ScrapeMetrics]:
+    """Scrape the job postings for a chunk of the (already deduplicated) job meta."""
+    scraper = DataJobsScraper(
+        site, supervisor=_shard_supervisor, shard=shard, run_id=run_id
+    )
+    scraper.job_meta = job_meta
+    scraper.scrape_job_text()
+    scraper._checkpoint.clear()
+    # the Indeed scraper fills in company/salary/location from the posting, so hand back the job meta too
+    return scraper.job_meta, scraper.job_descriptions, scraper.metrics
+
+
+def scrape_sharded(
+    site: str,
+    workers: int | None = None,
+    states: list[str] | None = None,
+    jobs: list[str] | None = None,
+    max_pages: int | None = None,
+    data_path: str | None = None,
+) -> DataJobsScraper:
+    """Run the scraper across a pool of processes, each with its own Chrome driver. The (job title, state) search grid is split
+    up between the workers, their results are merged and deduplicated once, and then the job postings are split up between
+    the workers for the description scrape. Returns a cleaned scraper that is ready for `export_data`.
 
-            # get html
-            job_desc_clean = (
-                cleanhtml(job_descr.get_attribute("innerHTML"))
-                .replace("&amp;", "&")
-                .replace("&amp,", "&")
-                .replace("&nbsp;", " ")
-                .replace("&nbsp,", " ")
+    Keyword Arguments:
+    site -- the website to scrape, only Indeed has a search grid to split up
+    workers -- number of worker processes (and browsers), defaults to the configured workers
+    states -- locations to search, defaults to indeed_states. Use `state_names` to get around the page limit
+    jobs -- job titles to search, defaults to indeed_jobs
+    max_pages -- the most pages of a search to go through, defaults to the configured max_pages
+    data_path -- for incremental runs, postings that are already exported here aren't scraped again
+    """
+    if site != "Indeed":
+        raise ValueError(f"Sharded runs are only supported for Indeed, not {site}")
+
+    grid = list(product(jobs or indeed_jobs, states or indeed_states))
+    n_shards = min(workers or WORKERS, len(grid))
+
+    merged = DataJobsScraper(site)
+    with ProcessPoolExecutor(
+        max_workers=n_shards, initializer=_init_shard_worker
+    ) as pool:
+        # round robin the grid so every worker gets a mix of big and small searches
+        board_results = list(
+            pool.map(
+                _scrape_board_shard,
+                [site] * n_shards,
+                range(n_shards),
+                [grid[k::n_shards] for k in range(n_shards)],
+                [merged.run_id] * n_shards,
+                [max_pages] * n_shards,
             )
-            job_desc_list.append(
-                {
-                    "job_id": job["job_id"],
-                    "title": job["title"],
-                    "company": company_name[0],
-                    "desc": job_desc_clean,
-                }
+        )
+        with merged.metrics.stage("concat"):
+            job_meta = pd.concat([jm for jm, _ in board_results], ignore_index=True)
+
+        # the single dedup step, same posting key as `scrape_jobs` (and the same job key, the shards overlap on national postings)
+        with merged.metrics.stage("dedup"):
+            dupes = duplicated_postings(job_meta) | job_meta["url"].duplicated().to_numpy()
+            if data_path is not None:
+                seen = exported_postings(job_meta, data_path, site)
+                merged.metrics.count("already_exported", int(seen[~dupes].sum()))
+                dupes = dupes | seen
+            job_meta = job_meta[~dupes].reset_index(drop=True)
+        job_meta["job_id"] = job_meta.index + 1
+
+        # now split the postings up. a few chunks per worker evens out slow chunks
+        n_chunks = min(len(job_meta), 4 * n_shards) or 1
+        chunks = np.array_split(np.arange(len(job_meta)), n_chunks)
+        desc_results = list(
+            pool.map(
+                _scrape_desc_shard,
+                [site] * n_chunks,
+                range(n_chunks),
+                [job_meta.iloc[c] for c in chunks],
+                [merged.run_id] * n_chunks,
             )
-        return job_desc_list
-
-    def __pay_handler(self, pay_string: str) -> str | list:
-        # takes a string that either contains the salary or a range of salaries and pulls out the integer values
-        # split on the dash
-        pays = pay_string.split("-")
-        # remove all non-numeric characters
-        try:
-            pays = [float(re.sub(r"[^\d\.]*", "", x)) for x in pays]
-        except ValueError:
-            logging.error(f"couldn't convert to float: {pay_string}")
-        if len(pays) > 2:
-            logging.error(f"there are too many pays! {pay_string}")
-            return pay_string
-        
-        # convert all pay intervals to a yearly salary
-        if "year" in pay_string:
-            return pays
-        elif "month" in pay_string:
-            # we only want to return yearly salaries
-            return [12 * x for x in pays]
-        elif "week" in pay_string:
-            return [52 * x for x in pays]
-        elif "day" in pay_string:
-            return [255 * x for x in pays]
-        elif "hour" in pay_string or "hr" in pay_string:
-            return [40 * 52 * x for x in pays]
-        elif pays[0] > 30_000:
-            return pays[0]
-        else:
-            logging.error(f"Pay error. not sure how to parse: {pay_string}")
-            return pay_string
-
-    def __clean_indeed_link(self, links: list) -> list:
-        # takes a list of indeed job link suffixes and returns the real job posting links 
-        clean_links = []
-        for link in links:
-            if link.startswith("/rc/clk?"):
-                clean_links.append(
-                    "https://www.indeed.com/viewjob?" + link[8:].replace("&amp;", "&")
-                )
-            elif link.startswith("/pagead"):
-                clean_links.append(
-                    "https://www.indeed.com" + link.replace("&amp;", "&")
-                )
-            else:
-                logging.critical(f"We haven't handled this link type: {link[:20]}")
-                clean_links.append(link)
+        )
 
-        return clean_links
+    merged.job_meta = pd.concat([jm for jm, _, _ in desc_results])
+    merged.job_descriptions = enforce_job_descriptions_schema(
+        pd.concat([jd for _, jd, _ in desc_results], ignore_index=True)
+    )
+    for metrics in [m for _, m in board_results] + [m for _, _, m in desc_results]:
+        merged.metrics.merge(metrics)
+    merged.clean_data()
+    return merged
@@ -0,0 +1,227 @@
+"""
+Precomputed aggregates for the analysis notebook. The notebook used to rebuild every count from the raw rows each session:
+jobs per clean_title, jobs per state for the choropleth, salary distributions and keyword counts over all the job
+descriptions. `export_data` now keeps three small tables per site next to the csv files and only folds the newly exported
+rows into them:
+
+    {site}_agg_job-counts.csv -- jobs per pull_date x site x clean_title x state, plus a salary sum/count for averages
+    {site}_agg_salary-hist.csv -- salary histogram per pull_date x site x clean_title x state x salary type
+    {site}_agg_keywords.csv -- keyword totals (as counted by `kw_counter`) per pull_date x site x clean_title
+
+Use `load_aggregates` to read them back for all sites at once, it builds the tables of a site exported before there were
+aggregates from its csv files first. Like the posting index, the tables remember how many exported rows they cover and are
+rebuilt from the full history when that doesn't match.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from analysis import kw_counter
+from export_files import csv_path, verify_export
+from lists_and_dicts import (
+    concepts,
+    databases,
+    dev_tools,
+    libraries,
+    programming_languages,
+    soft_skills,
+    viz_tools,
+)
+from schema import PULL_DATE_FORMAT, read_job_descriptions, read_job_meta
+
+# the same keywords the notebook counts (some show up in more than one list)
+KEYWORDS = list(
+    dict.fromkeys(
+        programming_languages
+        + libraries
+        + dev_tools
+        + viz_tools
+        + databases
+        + soft_skills
+        + concepts
+    )
+)
+# width of the salary histogram bins, in dollars a year
+SALARY_BIN_WIDTH = 10_000
+
+COUNT_KEYS = ["pull_date", "site", "clean_title", "state"]
+SALARY_KEYS = COUNT_KEYS + ["salary_type", "salary_bin"]
+KEYWORD_KEYS = ["pull_date", "site", "clean_title", "keyword"]
+_TABLES = {
+    "job-counts": COUNT_KEYS,
+    "salary-hist": SALARY_KEYS,
+    "keywords": KEYWORD_KEYS,
+}
+# the columns summed up in each table
+_VALUES = {
+    "job-counts": ["jobs", "salary_sum", "salary_n"],
+    "salary-hist": ["jobs"],
+    "keywords": ["mentions"],
+}
+
+
+def _empty_tables() -> dict[str, pd.DataFrame]:
+    # tables without any rows yet, but with their columns so they can still be filtered and grouped
+    return {name: pd.DataFrame(columns=keys + _VALUES[name]) for name, keys in _TABLES.items()}
+
+
+def _job_counts(job_meta: pd.DataFrame) -> pd.DataFrame:
+    # same average salary as the notebook: the middle of the range, or the lower salary if there's no upper one
+    lower = job_meta["salary_lower"].astype(float)
+    upper = job_meta["salary_upper"].astype(float)
+    avg_salary = pd.Series(np.where(upper.isna(), lower, (lower + upper) / 2), index=job_meta.index)
+    df = job_meta[COUNT_KEYS].astype(object).assign(
+        jobs=1, salary_sum=avg_salary.fillna(0), salary_n=avg_salary.notna().astype(int)
+    )
+    return df.groupby(COUNT_KEYS, dropna=False, as_index=False).sum()
+
+
+def _salary_hist(job_meta: pd.DataFrame) -> pd.DataFrame:
+    df = (
+        job_meta[COUNT_KEYS + ["salary_lower", "salary_upper"]]
+        .astype({col: object for col in COUNT_KEYS})
+        .melt(id_vars=COUNT_KEYS, var_name="salary_type", value_name="salary")
+        .dropna(subset=["salary"])
+    )
+    df["salary_bin"] = (df["salary"].astype(float) // SALARY_BIN_WIDTH * SALARY_BIN_WIDTH).astype(int)
+    return df.groupby(SALARY_KEYS, dropna=False).size().reset_index(name="jobs")
+
+
+def _keyword_totals(job_meta: pd.DataFrame, job_descriptions: pd.DataFrame) -> pd.DataFrame:
+    df = job_descriptions[["job_id", "desc"]].merge(
+        job_meta[["job_id", "pull_date", "site", "clean_title"]].astype(
+            {"site": object, "clean_title": object}
+        ),
+        on="job_id",
+    )
+    rows = []
+    for keys, group in df.groupby(KEYWORD_KEYS[:-1], dropna=False):
+        # one long string per group, like the notebook does over all the descriptions
+        counts = kw_counter(text=group["desc"].fillna("").str.cat(sep=" "), kws=KEYWORDS)
+        rows += [(*keys, kw, n) for kw, n in counts.items() if n]
+    return pd.DataFrame(rows, columns=KEYWORD_KEYS + ["mentions"])
+
+
+def _combine(old: pd.DataFrame, new: pd.DataFrame, keys: list) -> pd.DataFrame:
+    # add the new partial aggregates onto the existing ones
+    if old.empty:
+        return new
+    return (
+        pd.concat([old, new], ignore_index=True)
+        .groupby(keys, dropna=False, as_index=False)
+        .sum()
+    )
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={"pull_date": str})
+    df["pull_date"] = pd.to_datetime(df["pull_date"], format=PULL_DATE_FORMAT)
+    return df
+
+
+class AnalyticsAggregates:
+    """The aggregate tables of one site."""
+
+    def __init__(self, data_path: str, site: str):
+        """Loads the site's aggregate tables, they start out empty if they haven't been built yet.
+
+        Keyword Arguments:
+        data_path -- the folder the scraper exports to
+        site -- the site the tables belong to
+        """
+        self.data_path = data_path
+        self.site = site
+        # number of exported job meta rows the tables cover
+        self.n_rows = 0
+        self.tables = _empty_tables()
+
+        manifest = self.__path("manifest", "json")
+        # False until the tables have been built (and saved) for the site
+        self.built = os.path.exists(manifest)
+        if self.built:
+            with open(manifest) as f:
+                self.n_rows = json.load(f)["n_rows"]
+            for name in _TABLES:
+                if os.path.exists(self.__path(name)):
+                    self.tables[name] = _read_table(self.__path(name))
+
+    def update(self, job_meta: pd.DataFrame, job_descriptions: pd.DataFrame):
+        """Fold newly exported rows into the tables. Only `job_meta` rows that weren't exported before belong in here.
+
+        Keyword Arguments:
+        job_meta -- the new job meta rows (after `clean_data`, so with state and clean_title)
+        job_descriptions -- the descriptions of those rows
+        """
+        new = {
+            "job-counts": _job_counts(job_meta),
+            "salary-hist": _salary_hist(job_meta),
+            "keywords": _keyword_totals(job_meta, job_descriptions),
+        }
+        for name, keys in _TABLES.items():
+            self.tables[name] = _combine(self.tables[name], new[name], keys)
+        self.n_rows += len(job_meta)
+
+    def update_keywords(
+        self,
+        job_meta: pd.DataFrame,
+        job_descriptions: pd.DataFrame,
+        replaced: pd.DataFrame | None = None,
+    ):
+        """Fold the descriptions newly stored for already exported rows into the keyword totals, taking the mentions of the
+        texts they replace back out. The job counts and salaries come from the job meta rows, a new description doesn't
+        change them.
+
+        Keyword Arguments:
+        job_meta -- the (already exported) job meta rows the descriptions belong to
+        job_descriptions -- the new descriptions (or new versions of stored ones)
+        replaced -- the stored descriptions the new versions replace, if any
+        """
+        delta = [_keyword_totals(job_meta, job_descriptions)]
+        if replaced is not None and len(replaced):
+            old = _keyword_totals(job_meta, replaced)
+            delta.append(old.assign(mentions=-old["mentions"]))
+        delta = pd.concat(delta, ignore_index=True).groupby(KEYWORD_KEYS, dropna=False, as_index=False).sum()
+        keywords = _combine(self.tables["keywords"], delta, KEYWORD_KEYS)
+        # keywords only the replaced texts mentioned are down to 0
+        self.tables["keywords"] = keywords[keywords["mentions"] != 0].reset_index(drop=True)
+
+    def rebuild(self, job_meta: pd.DataFrame, job_descriptions: pd.DataFrame):
+        """Throw the tables away and build them from the site's full history."""
+        self.n_rows = 0
+        self.tables = _empty_tables()
+        self.update(job_meta, job_descriptions)
+
+    def save(self):
+        for name, df in self.tables.items():
+            df.to_csv(self.__path(name), index=False, date_format=PULL_DATE_FORMAT)
+        # the manifest goes last, if we die before this the tables just get rebuilt next export
+        with open(self.__path("manifest", "json"), "w") as f:
+            json.dump({"n_rows": self.n_rows}, f)
+        self.built = True
+
+    def __path(self, name: str, ext: str = "csv") -> str:
+        return f"{self.data_path}/{self.site}_agg_{name}.{ext}"
+
+
+def load_aggregates(
+    data_path: str, sites: tuple = ("Indeed", "DataJobs")
+) -> dict[str, pd.DataFrame]:
+    """Read the aggregate tables of all sites, returns {"job-counts": ..., "salary-hist": ..., "keywords": ...}. A site that
+    was exported before there were aggregates gets its tables built from the exported csv files (once, they're saved)."""
+    per_site = []
+    for site in sites:
+        aggregates = AnalyticsAggregates(data_path, site)
+        if not aggregates.built and verify_export(data_path, site):
+            aggregates.rebuild(
+                read_job_meta(csv_path(data_path, site, "job-meta")),
+                read_job_descriptions(csv_path(data_path, site, "job-descriptions")),
+            )
+            aggregates.save()
+        per_site.append(aggregates.tables)
+    return {
+        name: pd.concat([tables[name] for tables in per_site], ignore_index=True)
+        for name in _TABLES
+    }
@@ -0,0 +1,94 @@
+"""
+Helpers for analyzing the scraped job data. These started life in the analysis notebook (Webscrape_DataJobs.ipynb) and
+were moved here so they can be reused and benchmarked outside of the notebook.
+"""
+
+
+def kw_counter(text, kws):
+    """
+    kw_counter will count all instances of the keywords in the kws list in the text variable.
+
+    Inputs:
+    -------
+        text -> (str): this is the raw text to extract the keyword counts from. It does not need to be lowered.
+        kws -> (list): the keywords to be searched for
+            NOTE: the function handles some keywords for which there could be multiple spellings. You may need to adjust this to add more.
+            NOTE: spaces are appended to the beginning and end of each keyword as not to match partially on words that we are not interested in
+    Outputs:
+    --------
+        kws_coutns -> (dict): a dictionary containing the keywords from kws and the counts of those keywords in text.
+    """
+    # this will hold our keyword counts
+    kws_counts = {}
+    # loop through the keywords
+    for kw in kws:
+        # set the initial keyword count to 0 (this is because we are using the += operator)
+        kws_counts[kw] = 0
+
+        # each conditional handles keywords for which there could be multiple spellings
+        if kw == "Scikit-learn":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" scikitlearn ")
+            kws_counts[kw] += text.lower().count(" scikit learn ")
+            kws_counts[kw] += text.lower().count(" sci kit learn ")
+        elif kw == "PowerBI":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" Power-BI ")
+            kws_counts[kw] += text.lower().count(" Power BI ")
+        elif kw == "Time-Series":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" time series ")
+        elif kw == "A/B Testing":
+            kws_counts[kw] += text.lower().count(" a/b test")
+            kws_counts[kw] += text.lower().count(" ab test")
+            kws_counts[kw] += text.lower().count(" a-b test")
+        elif kw == "GCP":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" google cloud ")
+        elif kw == "AWS":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" amazon web services ")
+        elif kw == "Webscraping":
+            kws_counts[kw] += text.lower().count(" webscrap")
+            kws_counts[kw] += text.lower().count(" web scrap ")
+        elif kw == "CNN":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" convolutional neural network ")
+        elif kw == "ANN":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" artificial neural network ")
+        elif kw == "RNN":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" recurrent neural network ")
+        elif kw == "LSTM":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" long-term short-term memory ")
+            kws_counts[kw] += text.lower().count(" long term short term memory ")
+        elif kw == "Semi-Supervised Learning":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" semi supervised learning ")
+        elif kw == "Forecasting":
+            kws_counts[kw] += text.lower().count(" forecast")
+        elif kw == "Presentation":
+            kws_counts[kw] += text.lower().count(" present")
+        elif kw == "Communication":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" communicate ")
+        elif kw == "Collaboration":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" collaborate ")
+        elif kw == "Adaptability":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" adapt ")
+            kws_counts[kw] += text.lower().count(" adaptable ")
+        elif kw == "Independence":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" independent ")
+        elif kw == "Creativity":
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+            kws_counts[kw] += text.lower().count(" creative ")
+        else:
+            # finally, if it is not one of the above keywords, just search for it normally.
+            kws_counts[kw] += text.lower().count(" " + kw.lower() + " ")
+
+    return kws_counts
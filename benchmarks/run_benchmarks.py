@@ -0,0 +1,420 @@
+"""
+Offline benchmarks for the scraper's parsing and data handling code. Nothing here touches the network or starts a browser:
+the board/posting pages in `benchmarks/fixtures` are saved copies of the DataJobs and Indeed markup the regexes target, and
+they are tiled up into synthetic data sets of whatever size you ask for.
+
+Usage (from the repo root):
+    python benchmarks/run_benchmarks.py                          # 10k rows
+    python benchmarks/run_benchmarks.py --rows 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/a.json benchmarks/results/b.json
+
+Every run writes a JSON file to `benchmarks/results` tagged with the current git commit, so runs can be compared across
+commits with `--compare`.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES = os.path.join(BENCH_DIR, "fixtures")
+RESULTS = os.path.join(BENCH_DIR, "results")
+
+# the scraper sets up logging and its checkpoint file at import/construction time, keep all of that out of the real data folders
+_scratch = tempfile.mkdtemp(prefix="jobscraper-bench-")
+os.environ["LOG_PATH"] = _scratch
+os.environ["DATA_PATH"] = _scratch
+sys.path.insert(0, REPO_DIR)
+
+import regex as re
+
+import JobScraper as js
+from aggregates import AnalyticsAggregates
+from analysis import kw_counter
+from desc_fingerprints import DescriptionIndex, description_keys
+from export_files import commit_export, csv_path, manifest_path, write_csv_tmp
+from posting_index import PostingIndex, posting_keys
+from schema import PULL_DATE_FORMAT
+from lists_and_dicts import (
+    concepts,
+    databases,
+    dev_tools,
+    libraries,
+    programming_languages,
+    soft_skills,
+    viz_tools,
+)
+from site_adapters import cleanhtml, dj_pattern, indeed_job_key, parse_datajobs_board
+
+# job board pages hold about this many listings, used to turn a row count into a page count
+LISTINGS_PER_PAGE = 25
+# posting level benchmarks (full html pages) are a lot heavier per item, so they run on rows // POSTING_DIVISOR pages
+POSTING_DIVISOR = 10
+
+ADDRESSES = [
+    "Seattle, WA",
+    "New York City, NY",
+    "1600 Pennsylvania Ave NW, Washington, DC 20500",
+    "Remote in Austin, TX 78701",
+    "Hybrid remote in San Francisco, CA",
+    "100 Washington Blvd, Jersey City, NJ",
+    "Greater Chicago Area",
+    "Portland, Oregon",
+    "United States",
+    "500 NE Multnomah St, Portland, OR 97232",
+]
+# Indeed pay strings and the yearly (salary_lower, salary_upper) they should come out as, `check_salaries` holds
+# normalize_salaries to them
+PAY_STRINGS = {
+    "$120,000 - $150,000 a year": (120_000, 150_000),
+    "$120K - $150K a year": (120_000, 150_000),
+    "$95,000 a year": (95_000, np.nan),
+    "$45 - $60 an hour": (93_600, 124_800),
+    "$8,000 - $10,000 a month": (96_000, 120_000),
+    "$2,500 a week": (130_000, np.nan),
+    "$400 - $550 a day": (102_000, 140_250),
+    "From $130,000 a year": (130_000, np.nan),
+    "Up to $75 an hour": (156_000, np.nan),
+}
+# job board pages that make the old dj_pattern backtrack (unterminated listings on a single line)
+PATHOLOGICAL_PAGES = [
+    "<div>"
+    + '<a href="/Acme-Job~1"><strong>Data Scientist</strong> – <span class="company-name">Acme</span></a>' * n
+    + "\n</div>"
+    for n in (100, 400, 2000)
+] + ['<a href="/Acme-Job~1"><strong>' + "Data Scientist " * 100_000]
+# cap on the time the old pattern gets per pathological page, it can take hours otherwise
+PATHOLOGICAL_TIMEOUT = 2
+
+
+def legacy_findall(page: str) -> list:
+    try:
+        return re.findall(dj_pattern, page, timeout=PATHOLOGICAL_TIMEOUT)
+    except TimeoutError:
+        return []
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def git_commit() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=REPO_DIR,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timeit(fn, setup=None, repeat: int = 3) -> dict:
+    """Run `fn` `repeat` times (calling `setup` untimed before each run) and return the best and median wall times."""
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return {"best_s": min(times), "median_s": statistics.median(times)}
+
+
+def tile(items: list, n: int) -> list:
+    """Repeat `items` until there are `n` of them."""
+    return (items * (n // len(items) + 1))[:n]
+
+
+def board_pages(fixture: str, block_start: str, tail_start: str, n_rows: int) -> list:
+    """Scale a saved job board page up to `n_rows` listings spread over pages of LISTINGS_PER_PAGE listings.
+
+    Keyword Arguments:
+    fixture -- file name of the saved board page
+    block_start -- the markup every listing starts with
+    tail_start -- the markup right after the last listing
+    n_rows -- total number of listings wanted
+    """
+    html = read_fixture(fixture)
+    head, rest = html.split(block_start, 1)
+    body, tail = rest.split(tail_start, 1)
+    # split back into single listing blocks so we can tile them
+    blocks = [block_start + b for b in (block_start + body).split(block_start) if b]
+    page = head + "".join(tile(blocks, LISTINGS_PER_PAGE)) + tail_start + tail
+    return [page] * max(1, n_rows // LISTINGS_PER_PAGE)
+
+
+def bench_suite(n_rows: int, repeat: int) -> dict:
+    """Run every benchmark at a scale of `n_rows` rows."""
+    results = {}
+    n_postings = max(1, n_rows // POSTING_DIVISOR)
+    rng = np.random.default_rng(0)
+
+    def record(name: str, n: int, timing: dict):
+        timing["n"] = n
+        timing["per_item_us"] = 1e6 * timing["best_s"] / n
+        results[name] = timing
+        print(f"  {name:<28} n={n:<9} best={timing['best_s']:.4f}s  ({timing['per_item_us']:.2f} us/item)")
+
+    # --- job board parsing -------------------------------------------------------------------------------------------
+    dj_pages = board_pages(
+        "datajobs_board.html",
+        '        <div class="stealth-header">',
+        '  </div>\n  <div class="pagination">',
+        n_rows,
+    )
+    record(
+        "dj_pattern_findall",
+        len(dj_pages) * LISTINGS_PER_PAGE,
+        timeit(lambda: [re.findall(dj_pattern, p) for p in dj_pages], repeat=repeat),
+    )
+
+    record(
+        "dj_board_parser",
+        len(dj_pages) * LISTINGS_PER_PAGE,
+        timeit(lambda: [parse_datajobs_board(p) for p in dj_pages], repeat=repeat),
+    )
+    # malformed pages: listings that never close, all on one line. dj_pattern goes cubic on these so it only gets a timeout
+    record(
+        "dj_board_parser_pathological",
+        len(PATHOLOGICAL_PAGES),
+        timeit(
+            lambda: [parse_datajobs_board(p, budget=PATHOLOGICAL_TIMEOUT) for p in PATHOLOGICAL_PAGES],
+            repeat=repeat,
+        ),
+    )
+    record(
+        "dj_pattern_pathological",
+        len(PATHOLOGICAL_PAGES),
+        timeit(lambda: [legacy_findall(p) for p in PATHOLOGICAL_PAGES], repeat=1),
+    )
+
+    indeed_pages = board_pages("indeed_board.html", "<li><div", "</ul></div>\n<nav", n_rows)
+    title_pattern = "<span[^>]*jobTitle[^>]*>(?<=>)(.*?)(?=<)"
+    link_pattern = '<h2[^>]*jobTitle[^>]*><a[^>]*href="([^">]*)">'
+    record(
+        "indeed_board_regex",
+        len(indeed_pages) * LISTINGS_PER_PAGE,
+        timeit(
+            lambda: [
+                (re.findall(title_pattern, p), re.findall(link_pattern, p))
+                for p in indeed_pages
+            ],
+            repeat=repeat,
+        ),
+    )
+
+    indeed_links = [link for p in indeed_pages for link in re.findall(link_pattern, p)]
+    record(
+        "indeed_job_key",
+        len(indeed_links),
+        timeit(lambda: [indeed_job_key(link) for link in indeed_links], repeat=repeat),
+    )
+
+    # --- posting pages -----------------------------------------------------------------------------------------------
+    indeed_posting = read_fixture("indeed_posting.html")
+    dj_posting = read_fixture("datajobs_posting.html")
+    record(
+        "remove_script_style_tags",
+        n_postings,
+        timeit(
+            lambda: [
+                js.remove_style_tags(js.remove_script_tags(indeed_posting))
+                for _ in range(n_postings)
+            ],
+            repeat=repeat,
+        ),
+    )
+    record(
+        "cleanhtml",
+        n_postings,
+        timeit(lambda: [cleanhtml(dj_posting) for _ in range(n_postings)], repeat=repeat),
+    )
+
+    # --- derived columns ---------------------------------------------------------------------------------------------
+    addresses = pd.Series(rng.choice(ADDRESSES, n_rows))
+    record(
+        "get_state_code",
+        n_rows,
+        timeit(lambda: addresses.apply(js.get_state_code), repeat=repeat),
+    )
+    dj_titles = [t for _, t, *_ in re.findall(dj_pattern, dj_pages[0])]
+    titles = pd.Series(rng.choice(dj_titles, n_rows))
+    record(
+        "clean_title",
+        n_rows,
+        timeit(lambda: titles.apply(js.clean_title), repeat=repeat),
+    )
+
+    pay_strings = pd.Series(rng.choice(list(PAY_STRINGS), n_rows))
+    record(
+        "normalize_salaries",
+        n_rows,
+        timeit(lambda: js.normalize_salaries(pay_strings), repeat=repeat),
+    )
+    check_salaries()
+
+    # --- export merge ------------------------------------------------------------------------------------------------
+    record(
+        "export_data_merge",
+        n_rows,
+        timeit(lambda s: s.export_data(_scratch), setup=lambda: (export_setup(n_rows, rng),), repeat=repeat),
+    )
+    check_export()
+
+    # --- notebook keyword counting -----------------------------------------------------------------------------------
+    desc = cleanhtml(dj_posting)
+    # descriptions are a couple KB each, keep the concatenated text at a sane size for the big scales
+    n_desc = min(n_rows, 100_000)
+    text = " ".join([desc] * n_desc)
+    keywords = (
+        programming_languages + libraries + dev_tools + viz_tools + databases + soft_skills + concepts
+    )
+    record(
+        "kw_counter",
+        n_desc,
+        timeit(lambda: kw_counter(text=text, kws=keywords), repeat=repeat),
+    )
+
+    return results
+
+
+def export_setup(n_rows: int, rng) -> js.DataJobsScraper:
+    """Write an existing history of `n_rows` jobs to the scratch folder and return a scraper holding 10% new rows."""
+    def job_meta(n, start):
+        return pd.DataFrame(
+            {
+                "url": [f"https://www.indeed.com/viewjob?jk={k:016x}" for k in range(start, start + n)],
+                "title": rng.choice(["Data Scientist", "Data Analyst", "Data Engineer"], n),
+                "company": rng.choice(["Acme", "Contoso", "Fabrikam"], n),
+                "location": rng.choice(ADDRESSES, n),
+                "salary_lower": rng.integers(60_000, 150_000, n).astype(float),
+                "salary_upper": rng.integers(150_000, 250_000, n).astype(float),
+                "job_category": "Data Scientist",
+                "site": "https://indeed.com/",
+                "job_id": np.arange(1, n + 1),
+                # exports are cleaned first, the aggregates group on these
+                "pull_date": pd.Timestamp("2024-05-24"),
+                "state": rng.choice(["WA", "NY", "CA"], n),
+                "clean_title": rng.choice(["Data Scientist", "Data Analyst", "Data Engineer"], n),
+            }
+        )
+
+    def descriptions(jm):
+        # every description names its posting's url, so `check_export` can tell which posting it got stored with
+        return pd.DataFrame(
+            {"job_id": jm["job_id"], "title": jm["title"], "company": jm["company"], "desc": "short description of " + jm["url"]}
+        )
+
+    # a committed export (csv files and manifest) with up to date indexes and aggregates, like every export after the first one
+    # would find. all of it is written again every time, the previous repeat's export changed every one of these files
+    old = job_meta(n_rows, 0)
+    # the last posting's description never loaded, so the highest job_ids of the two files differ
+    old_jd = descriptions(old)[:-1]
+    if os.path.exists(manifest_path(_scratch, "Indeed")):
+        os.remove(manifest_path(_scratch, "Indeed"))
+    write_csv_tmp(old, csv_path(_scratch, "Indeed", "job-meta"), date_format=PULL_DATE_FORMAT)
+    write_csv_tmp(old_jd, csv_path(_scratch, "Indeed", "job-descriptions"))
+    commit_export(_scratch, "Indeed", {"job-meta": len(old), "job-descriptions": len(old_jd)})
+    PostingIndex.build(f"{_scratch}/Indeed_posting-index.npz", old).save()
+    desc_keys, _ = description_keys(old, posting_keys(old), old_jd)
+    DescriptionIndex.build(f"{_scratch}/Indeed_desc-index.npz", desc_keys, old_jd).save()
+    aggregates = AnalyticsAggregates(_scratch, "Indeed")
+    aggregates.rebuild(old, old_jd)
+    aggregates.save()
+
+    scraper = js.DataJobsScraper("Indeed")
+    # half of the new rows are re-posts of old jobs so the dedup has something to do
+    n_new = max(1, n_rows // 10)
+    scraper.job_meta = job_meta(n_new, n_rows - n_new // 2)
+    scraper.job_descriptions = descriptions(scraper.job_meta)
+    return scraper
+
+
+def check_salaries():
+    """Make sure normalize_salaries reads every pay string in PAY_STRINGS right. Raises ValueError if one comes out wrong."""
+    salaries = js.normalize_salaries(pd.Series(list(PAY_STRINGS)))
+    expected = np.array(list(PAY_STRINGS.values()), dtype=float)
+    wrong = ~np.isclose(salaries[["salary_lower", "salary_upper"]].to_numpy(), expected, equal_nan=True).all(axis=1)
+    if wrong.any():
+        raise ValueError(
+            f"normalize_salaries misread {np.array(list(PAY_STRINGS))[wrong].tolist()}: "
+            f"{salaries[wrong].to_numpy().tolist()}"
+        )
+
+
+def check_export():
+    """Make sure the last export stored every description with its own posting. Raises ValueError if one ended up with
+    another posting's job_id."""
+    job_meta = pd.read_csv(csv_path(_scratch, "Indeed", "job-meta"), usecols=["job_id", "url"])
+    job_descriptions = pd.read_csv(csv_path(_scratch, "Indeed", "job-descriptions"), usecols=["job_id", "desc"])
+    merged = job_descriptions.merge(job_meta, on="job_id", how="left")
+    wrong = merged["desc"] != "short description of " + merged["url"]
+    if wrong.any():
+        raise ValueError(f"the export paired {wrong.sum():,} of {len(merged):,} descriptions with the wrong posting")
+
+
+def compare(path_a: str, path_b: str):
+    """Print the relative change of every benchmark between two result files."""
+    with open(path_a) as f:
+        a = json.load(f)
+    with open(path_b) as f:
+        b = json.load(f)
+    print(f"{a['commit']} -> {b['commit']}")
+    for scale, res_b in b["scales"].items():
+        res_a = a["scales"].get(scale, {})
+        print(f"rows={scale}")
+        for name, timing in res_b.items():
+            if name not in res_a:
+                print(f"  {name:<28} new: {timing['best_s']:.4f}s")
+                continue
+            ratio = timing["best_s"] / res_a[name]["best_s"]
+            print(f"  {name:<28} {res_a[name]['best_s']:.4f}s -> {timing['best_s']:.4f}s  (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="row counts to scale the fixtures up to")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best one is reported")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    out = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "scales": {},
+    }
+    for n_rows in args.rows:
+        print(f"rows={n_rows}")
+        out["scales"][str(n_rows)] = bench_suite(n_rows, args.repeat)
+
+    os.makedirs(RESULTS, exist_ok=True)
+    path = os.path.join(RESULTS, f"{datetime.now():%Y%m%d-%H%M%S}_{out['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(out, f, indent=2)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Checkpointing for long scrape runs. Everything the scraper collects lives in memory until `export_data` is called, so a
+crashed browser or a reboot used to throw away hours of work. This module keeps a small SQLite file next to the exported
+data holding the latest job_meta snapshot, the job descriptions (and other records) scraped so far, and a cursor describing
+where the scraper was (which board/query, which page, which posting). SQLite commits are atomic, so a crash mid-checkpoint just leaves the
+previous checkpoint in place.
+"""
+
+import json
+import sqlite3
+import time
+from io import StringIO
+
+import pandas as pd
+
+
+def _json_default(obj):
+    # numpy scalars (job_id is an int64 once it comes out of a DataFrame) aren't JSON serializable by default
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+class ScrapeCheckpoint:
+    """Durable store for the in-progress state of a scrape run. One checkpoint file is kept per site.
+
+    The store holds three things:
+        1) job_meta -- a full snapshot of the job meta DataFrame (small, so it's simply replaced each time)
+        2) records -- named lists of records (job descriptions, posting details), append only so we never rewrite the big
+           text blobs
+        3) cursor -- a small dict describing where the scraper is, used to resume the run
+    """
+
+    def __init__(self, path: str, interval: float = 60):
+        """Opens (or creates) the checkpoint database.
+
+        Keyword Arguments:
+        path -- the file path of the SQLite checkpoint file
+        interval -- minimum number of seconds between checkpoints when `save` is not forced
+        """
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+        # number of records of each kind already written to the checkpoint, so we only append the new ones
+        self._n_saved = {}
+
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS job_meta (payload TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, kind TEXT, payload TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cursor (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def due(self) -> bool:
+        """True once `interval` seconds have passed since the last checkpoint."""
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(
+        self,
+        job_meta: pd.DataFrame,
+        records: dict[str, list],
+        cursor: dict,
+        force: bool = False,
+    ) -> bool:
+        """Write a checkpoint if one is due (or forced). Returns True if a checkpoint was written.
+
+        Keyword Arguments:
+        job_meta -- the scraper's current job meta DataFrame
+        records -- the record lists scraped so far by name (e.g. {"descriptions": [...]}), lists only ever grow
+        cursor -- where the scraper currently is, this is handed back by `load` when resuming
+        force -- write the checkpoint even if the interval hasn't passed yet
+        """
+        if not force and not self.due():
+            return False
+
+        new_records = [
+            (kind, json.dumps(rec, default=_json_default))
+            for kind, recs in records.items()
+            for rec in recs[self._n_saved.get(kind, 0) :]
+        ]
+        # one transaction so the snapshot, records and cursor always agree with each other
+        with self._conn:
+            self._conn.execute("DELETE FROM job_meta")
+            self._conn.execute(
+                "INSERT INTO job_meta (payload) VALUES (?)",
+                (job_meta.to_json(orient="table", index=False),),
+            )
+            self._conn.executemany(
+                "INSERT INTO records (kind, payload) VALUES (?, ?)", new_records
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cursor (key, value) VALUES ('cursor', ?)",
+                (json.dumps(cursor, default=_json_default),),
+            )
+
+        self._n_saved = {kind: len(recs) for kind, recs in records.items()}
+        self._last_save = time.monotonic()
+        return True
+
+    def load(self) -> tuple[pd.DataFrame | None, dict[str, list], dict]:
+        """Read back the last checkpoint as (job_meta, records, cursor). job_meta is None if nothing was saved."""
+        row = self._conn.execute("SELECT payload FROM job_meta").fetchone()
+        job_meta = pd.read_json(StringIO(row[0]), orient="table") if row else None
+
+        records = {}
+        for kind, payload in self._conn.execute(
+            "SELECT kind, payload FROM records ORDER BY id"
+        ):
+            records.setdefault(kind, []).append(json.loads(payload))
+        # these are already on disk, no need to write them again
+        self._n_saved = {kind: len(recs) for kind, recs in records.items()}
+
+        row = self._conn.execute(
+            "SELECT value FROM cursor WHERE key = 'cursor'"
+        ).fetchone()
+        cursor = json.loads(row[0]) if row else {}
+
+        return job_meta, records, cursor
+
+    def clear(self):
+        """Drop the checkpoint once the run has been exported successfully."""
+        with self._conn:
+            self._conn.execute("DELETE FROM job_meta")
+            self._conn.execute("DELETE FROM records")
+            self._conn.execute("DELETE FROM cursor")
+        self._n_saved = {}
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,197 @@
+"""
+Fingerprints of the job descriptions, to tell an edited posting from one we've already stored. `export_data` used to drop the
+description of every posting it had seen before (only descriptions whose job_id survived the posting dedup were kept), so
+an edited posting kept its old text forever. Now every stored description has:
+
+    fingerprint -- a 64-bit blake2b hash of the text (whitespace collapsed), equal texts have equal fingerprints
+    simhash -- optional (`simhash_distance` > 0), a 64-bit SimHash of the words. Near identical texts have SimHashes a few bits
+               apart, so small edits (a date, a typo) can count as unchanged
+
+They're kept by posting key (see posting_index.py) in `{site}_desc-index.npz`, along with the job_id and version of the stored
+description. A re-visited posting whose fingerprint matches is skipped. One that changed gets its new text stored as the next
+version, and the old text moves to `{site}_job-description-versions.csv`.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import regex as re
+
+_WORD = re.compile(r"\w+")
+
+
+def _texts(descs: pd.Series) -> list:
+    return descs.astype(object).fillna("").astype(str).tolist()
+
+
+def fingerprints(descs: pd.Series) -> np.ndarray:
+    """The blake2b fingerprint of every description, as uint64."""
+    return np.array(
+        [
+            int.from_bytes(hashlib.blake2b(" ".join(text.split()).encode(), digest_size=8).digest(), "little")
+            for text in _texts(descs)
+        ],
+        dtype=np.uint64,
+    )
+
+
+def simhashes(descs: pd.Series) -> np.ndarray:
+    """The SimHash of every description's words, as uint64 (0 for a description without words)."""
+    out = np.zeros(len(descs), dtype=np.uint64)
+    for i, text in enumerate(_texts(descs)):
+        words = _WORD.findall(text.lower())
+        if not words:
+            continue
+        # every bit of the simhash is the majority vote of that bit over the words' hashes
+        hashes = pd.util.hash_array(np.array(words, dtype=object))
+        bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)
+        votes = 2 * bits.sum(axis=0, dtype=np.int64) > len(words)
+        out[i] = np.packbits(votes).view(np.uint64)[0]
+    return out
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Number of bits that differ between each pair of uint64s."""
+    diff = np.bitwise_xor(a.astype(np.uint64), b.astype(np.uint64))
+    return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class DescriptionIndex:
+    """The fingerprints of every stored description, sorted by posting key and stored on disk, along with the number of
+    stored descriptions it covers. If that count doesn't match the exported csv anymore the index should be rebuilt."""
+
+    def __init__(self, path: str):
+        """Loads the index if it exists, otherwise starts empty.
+
+        Keyword Arguments:
+        path -- the .npz file the index lives in
+        """
+        self.path = path
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                self.keys = saved["keys"]
+                self.fingerprints = saved["fingerprints"]
+                self.simhashes = saved["simhashes"]
+                self.job_ids = saved["job_ids"]
+                self.versions = saved["versions"]
+                self.n_rows = int(saved["n_rows"])
+        else:
+            self.keys = np.empty(0, dtype=np.uint64)
+            self.fingerprints = np.empty(0, dtype=np.uint64)
+            self.simhashes = np.empty(0, dtype=np.uint64)
+            self.job_ids = np.empty(0, dtype=np.int64)
+            self.versions = np.empty(0, dtype=np.int64)
+            self.n_rows = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(
+        cls, path: str, keys: np.ndarray, job_descriptions: pd.DataFrame, simhash: bool = False
+    ) -> "DescriptionIndex":
+        """(Re)build the index from scratch out of the stored descriptions.
+
+        Keyword Arguments:
+        path -- the .npz file the index lives in
+        keys -- the posting key of every description
+        job_descriptions -- the stored descriptions, with their version if they have one
+        simhash -- compute the SimHashes too
+        """
+        index = cls.__new__(cls)
+        index.path = path
+        index.keys = np.empty(0, dtype=np.uint64)
+        index.fingerprints = np.empty(0, dtype=np.uint64)
+        index.simhashes = np.empty(0, dtype=np.uint64)
+        index.job_ids = np.empty(0, dtype=np.int64)
+        index.versions = np.empty(0, dtype=np.int64)
+        versions = job_descriptions["version"] if "version" in job_descriptions else pd.Series(1, index=job_descriptions.index)
+        index.set(
+            keys,
+            job_descriptions["desc"],
+            job_descriptions["job_id"].to_numpy(dtype=np.int64),
+            versions.fillna(1).to_numpy(dtype=np.int64),
+            simhash,
+        )
+        index.n_rows = len(job_descriptions)
+        return index
+
+    def lookup(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(found, position) of each of `keys` in the index."""
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=np.int64)
+        pos = np.searchsorted(self.keys, keys)
+        pos[pos == len(self.keys)] = 0
+        return self.keys[pos] == keys, pos
+
+    def changed(self, keys: np.ndarray, descs: pd.Series, max_distance: int = 0) -> tuple[np.ndarray, np.ndarray]:
+        """Compare re-visited descriptions with the stored ones. Returns (found, changed) masks: whether the posting has a
+        stored description, and whether the new text differs from it.
+
+        Keyword Arguments:
+        keys -- the posting keys of the descriptions
+        descs -- the descriptions
+        max_distance -- texts whose SimHash is at most this many bits from the stored one count as unchanged (0 only exact
+                        matches)
+        """
+        found, pos = self.lookup(keys)
+        changed = found & (fingerprints(descs) != self.fingerprints[pos])
+        if max_distance and changed.any():
+            stored = self.simhashes[pos[changed]]
+            close = (stored != 0) & (hamming(simhashes(descs[changed]), stored) <= max_distance)
+            changed[np.flatnonzero(changed)[close]] = False
+        return found, changed
+
+    def set(self, keys: np.ndarray, descs: pd.Series, job_ids: np.ndarray, versions: np.ndarray, simhash: bool = False):
+        """Store the fingerprints of new descriptions, or of new versions of stored ones (they replace the old entry)."""
+        if not len(keys):
+            return
+        new_simhashes = simhashes(descs) if simhash else np.zeros(len(keys), dtype=np.uint64)
+        # the new entries win over the old ones with the same key (and the last of a key over the earlier ones)
+        all_keys = np.concatenate([keys.astype(np.uint64), self.keys])
+        order = np.arange(len(all_keys))
+        order[: len(keys)] = order[: len(keys)][::-1]
+        all_keys = all_keys[order]
+        _, first = np.unique(all_keys, return_index=True)
+        keep = order[first]
+
+        def combine(new, old, dtype):
+            return np.concatenate([np.asarray(new, dtype=dtype), old])[keep]
+
+        self.fingerprints = combine(fingerprints(descs), self.fingerprints, np.uint64)
+        self.simhashes = combine(new_simhashes, self.simhashes, np.uint64)
+        self.job_ids = combine(job_ids, self.job_ids, np.int64)
+        self.versions = combine(versions, self.versions, np.int64)
+        self.keys = combine(keys, self.keys, np.uint64)
+
+    def save(self):
+        # write next to the real file and swap it in, so a crash never leaves a half written index
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp,
+            keys=self.keys,
+            fingerprints=self.fingerprints,
+            simhashes=self.simhashes,
+            job_ids=self.job_ids,
+            versions=self.versions,
+            n_rows=self.n_rows,
+        )
+        os.replace(tmp, self.path)
+
+
+def description_keys(job_meta: pd.DataFrame, keys: np.ndarray, job_descriptions: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """The posting key of every description, through its job_id. Returns (keys, found), found is False (and the key 0) for
+    descriptions without a job meta row.
+
+    Keyword Arguments:
+    job_meta -- the job meta rows
+    keys -- the posting keys of the job meta rows (`posting_keys(job_meta)`)
+    job_descriptions -- the descriptions
+    """
+    job_ids = pd.Index(job_meta["job_id"].to_numpy())
+    first = ~job_ids.duplicated()
+    pos = job_ids[first].get_indexer(job_descriptions["job_id"].to_numpy())
+    found = pos >= 0
+    return np.where(found, keys[first][pos], 0).astype(np.uint64), found
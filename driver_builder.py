@@ -9,6 +9,8 @@ browser using headers (which is oddly not the default selenium behavior).
 
 """
 
+import logging
+
 from selenium.webdriver import Chrome
 from selenium.webdriver.chrome import webdriver as chrome_webdriver
 
@@ -16,6 +18,8 @@ from selenium.webdriver.chrome import webdriver as chrome_webdriver
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 
+from tab_pool import TabPool
+
 
 class DriverBuilder:
     """Class to build a chrome driver in selenium. The key functionality is it allows chrome to automatically download files to a
@@ -23,35 +27,78 @@ class DriverBuilder:
     safebrowsing options, and emulates a user browser by using headers."""
 
     def get_driver(
-        self, download_location: str = None, headless: bool = False
+        self, download_location: str = None, headless: bool = False, lean: bool = False
     ) -> chrome_webdriver:
         """Calls the driver configuration manager and sets the chrome window size
 
         Keyword Arguments:
         download_location -- path to where files will be automatically downloaded, defaults to system defualt.
         headless -- tells the scraper to open up a browswer window or just run the driver in the background.
+        lean -- skip what the scraper doesn't need (images, extensions, GPU, waiting on subresources), for production runs
         """
-        driver = self._get_chrome_driver(download_location, headless)
+        driver = self._get_chrome_driver(download_location, headless, lean)
 
         driver.set_window_size(1400, 700)
 
         return driver
 
+    def get_tab_pool(
+        self,
+        tabs: int,
+        driver: chrome_webdriver = None,
+        download_location: str = None,
+        headless: bool = False,
+        timeout=None,
+        lean: bool = False,
+    ) -> TabPool:
+        """Tab-pool mode: one browser with `tabs` extra tabs that load pages in the background (see tab_pool.py). A lot less
+        memory than a browser per page.
+
+        Keyword Arguments:
+        tabs -- number of background tabs
+        driver -- an already running driver to open the tabs in, a new one is started if not given
+        download_location -- passed on to `get_driver` when starting a new driver
+        headless -- passed on to `get_driver` when starting a new driver
+        timeout -- an AdaptiveTimeout for the page loads
+        lean -- passed on to `get_driver` when starting a new driver
+        """
+        if driver is None:
+            driver = self.get_driver(download_location, headless, lean)
+        return TabPool(driver, tabs, timeout)
+
     def _get_chrome_driver(
-        self, download_location: str = None, headless: bool = False
+        self, download_location: str = None, headless: bool = False, lean: bool = False
     ) -> chrome_webdriver:
 
         # enables passing of chrome options to header
         chrome_options = chrome_webdriver.Options()
+        prefs = {}
         if download_location:
-            prefs = {
-                "download.default_directory": download_location,
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": False,
-                "safebrowsing.disable_download_protection": True,
-            }
-
+            prefs.update(
+                {
+                    "download.default_directory": download_location,
+                    "download.prompt_for_download": False,
+                    "download.directory_upgrade": True,
+                    "safebrowsing.enabled": False,
+                    "safebrowsing.disable_download_protection": True,
+                }
+            )
+
+        if lean:
+            # the scraper only reads the html, so don't fetch images or run anything it doesn't need
+            prefs["profile.managed_default_content_settings.images"] = 2
+            for argument in (
+                "--disable-extensions",
+                "--disable-gpu",
+                "--disable-notifications",
+                "--mute-audio",
+                "--no-first-run",
+            ):
+                chrome_options.add_argument(argument)
+            # driver.get returns once the DOM is there instead of after every stylesheet and script has loaded
+            chrome_options.page_load_strategy = "eager"
+
+        if prefs:
             chrome_options.add_experimental_option("prefs", prefs)
 
         if headless:
@@ -89,6 +136,4 @@ class DriverBuilder:
             "params": {"behavior": "allow", "downloadPath": download_dir},
         }
         command_result = driver.execute("send_command", params)
-        print("response from browser:")
-        for key in command_result:
-            print("result:" + key + ":" + str(command_result[key]))
+        logging.info("response from browser: %s", command_result)
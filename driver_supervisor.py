@@ -0,0 +1,156 @@
+"""
+Keeps the scraper's Chrome session alive over long runs. After a few hours of page loads Chrome tends to grow, slow down and
+eventually crash or hang, and since every step of the scrape goes through the one driver a single dead session used to kill
+the whole run. A `DriverSupervisor` owns the driver and:
+
+    1) runs each unit of work (a board page, a posting) under a watchdog. A call that hangs past the watchdog timeout gets
+       the browser killed, so the call fails instead of blocking forever
+    2) tells a dead browser from a page that just didn't load (`recover`). A dead one is replaced with a fresh session and the
+       scraper tries the page again
+    3) recycles the browser before it gets there, after `recycle_pages` pages or once Chrome's memory (the RSS of chromedriver
+       and all of its child processes) goes over `recycle_rss_mb`
+
+The driver changes on every restart, so hold on to the supervisor rather than `supervisor.driver`. `generation` counts the
+restarts, anything tied to the old browser (e.g. a TabPool's tabs) is gone when it changes.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+import psutil
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
+
+# what a driver call raises when the browser is gone: selenium's errors, or connection errors from talking to a chromedriver
+# that was killed
+SESSION_ERRORS = (WebDriverException, HTTPError, ConnectionError)
+
+# how often (in pages) to check the browser's memory, it walks the whole process tree
+RSS_CHECK_EVERY = 20
+
+
+class DriverSupervisor:
+    """Owns a selenium driver, restarting it when it crashes or hangs and recycling it when it gets old or big."""
+
+    def __init__(
+        self,
+        start: Callable,
+        driver=None,
+        recycle_pages: int = 500,
+        recycle_rss_mb: float = 1500,
+        watchdog_timeout: float = 120,
+    ):
+        """Keyword Arguments:
+        start -- starts a new driver, called for the first one (unless `driver` is given) and on every restart
+        driver -- an already running driver to start out with
+        recycle_pages -- restart the browser after this many pages (0 never)
+        recycle_rss_mb -- restart the browser once it uses more than this much memory (0 never)
+        watchdog_timeout -- seconds a unit of work can take before the browser is taken for hung and killed
+        """
+        self._start = start
+        self.driver = driver if driver is not None else start()
+        self.recycle_pages = recycle_pages
+        self.recycle_rss_mb = recycle_rss_mb
+        self.watchdog_timeout = watchdog_timeout
+        # restarts so far, and pages since the last one
+        self.generation = 0
+        self.pages = 0
+        # set when the watchdog killed the browser
+        self._hung = False
+
+    @contextmanager
+    def watch(self, timeout: float | None = None):
+        """Kill the browser if the block takes longer than `timeout` seconds (the watchdog timeout by default). The driver
+        call that's stuck then raises one of SESSION_ERRORS, and `recover` restarts the browser."""
+        timer = threading.Timer(timeout or self.watchdog_timeout, self.__kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    def alive(self) -> bool:
+        """Whether the browser still answers."""
+        if self._hung:
+            return False
+        try:
+            with self.watch(10):
+                self.driver.window_handles
+        except SESSION_ERRORS:
+            return False
+        return not self._hung
+
+    def recover(self) -> bool:
+        """Call after a driver call failed. Restarts the browser if it crashed or hung and returns True, returns False if it's
+        fine (the page just didn't load)."""
+        if self.alive():
+            return False
+        self.restart("the browser crashed or hung")
+        return True
+
+    def page_done(self) -> bool:
+        """Count a handled page, restarting the browser if it's due to be recycled. Returns whether it was."""
+        self.pages += 1
+        if self.recycle_pages and self.pages >= self.recycle_pages:
+            self.restart(f"recycled after {self.pages} pages")
+            return True
+        if self.recycle_rss_mb and self.pages % RSS_CHECK_EVERY == 0:
+            rss = self.rss_mb()
+            if rss > self.recycle_rss_mb:
+                self.restart(f"recycled at {rss:.0f} MB")
+                return True
+        return False
+
+    def rss_mb(self) -> float:
+        """Memory (RSS, in MB) of chromedriver and every browser process it started."""
+        total = 0
+        for process in self.__processes():
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 2**20
+
+    def restart(self, reason: str):
+        """Replace the browser with a fresh one."""
+        logging.warning("Restarting the browser, %s (%d pages in)", reason, self.pages)
+        self.quit()
+        self.driver = self._start()
+        self.generation += 1
+        self.pages = 0
+        self._hung = False
+
+    def quit(self):
+        """Quit the browser, killing whatever's left of it if it doesn't go quietly."""
+        processes = self.__processes()
+        try:
+            with self.watch(30):
+                self.driver.quit()
+        except SESSION_ERRORS:
+            pass
+        self.__kill_processes(processes)
+
+    def __processes(self) -> list:
+        # chromedriver and everything under it (the browser, its renderers, ...). Empty for drivers we didn't start locally
+        try:
+            driver_process = psutil.Process(self.driver.service.process.pid)
+            return [driver_process] + driver_process.children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return []
+
+    def __kill_processes(self, processes: list):
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(processes, timeout=5)
+
+    def __kill(self):
+        # the watchdog went off
+        logging.warning("The browser didn't respond in time, killing it")
+        self._hung = True
+        self.__kill_processes(self.__processes())
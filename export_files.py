@@ -0,0 +1,130 @@
+"""
+Crash safe writes of the exported csv files. `export_data` used to overwrite `{site}_job-meta.csv` and
+`{site}_job-descriptions.csv` in place, so a crash in the middle of a write left half a file behind, which the next export
+couldn't read and took for a first run, overwriting the whole history. Now every write goes:
+
+    1) the new csv files are written next to the real ones (`.csv.tmp`) and fsynced
+    2) their row counts and checksums go into `{site}_export-manifest.json`, swapped in atomically. This is the commit point
+    3) the temp files are renamed over the real ones
+
+Loading checks the csv files against the manifest first (`verify_export`). If a crash hit between 2) and 3) the temp files
+still match the manifest and the rename is simply finished. A crash before 2) leaves the old files and manifest untouched.
+Anything else that doesn't match is an error instead of a "first run", the history is never overwritten.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# the exported csv files every export has, by the name they go by in file names and the manifest. the old versions of edited
+# descriptions (job-description-versions) only show up once there are some
+KINDS = ("job-meta", "job-descriptions")
+
+
+def csv_path(data_path: str, site: str, kind: str) -> str:
+    return f"{data_path}/{site}_{kind}.csv"
+
+
+def manifest_path(data_path: str, site: str) -> str:
+    return f"{data_path}/{site}_export-manifest.json"
+
+
+def checksum(path: str) -> str:
+    """The sha256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fsync(path: str):
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str):
+    # makes the renames in the folder durable. Windows can't open folders, its renames go straight to disk anyway
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def read_manifest(data_path: str, site: str) -> dict:
+    """kind -> {"rows", "bytes", "sha256"} of the last committed export, empty if there's no manifest (nothing exported yet,
+    or exported before there were manifests)."""
+    path = manifest_path(data_path, site)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_csv_tmp(df: pd.DataFrame, path: str, **kwargs):
+    """Write a csv file to its temp file (`path` + ".tmp"), for `commit_export` to swap in. Keyword arguments go to `to_csv`."""
+    df.to_csv(f"{path}.tmp", index=False, **kwargs)
+
+
+def commit_export(data_path: str, site: str, rows: dict):
+    """Swap in the temp files written for a site's export, with the manifest as the commit point.
+
+    Keyword Arguments:
+    data_path -- the folder the scraper exports to
+    site -- the site the files belong to
+    rows -- kind -> number of rows, for every kind that has a temp file waiting. The others keep their manifest entry
+    """
+    manifest = read_manifest(data_path, site)
+    for kind, n_rows in rows.items():
+        tmp = f"{csv_path(data_path, site, kind)}.tmp"
+        _fsync(tmp)
+        manifest[kind] = {"rows": int(n_rows), "bytes": os.path.getsize(tmp), "sha256": checksum(tmp)}
+
+    path = manifest_path(data_path, site)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{path}.tmp", path)
+
+    for kind in rows:
+        real = csv_path(data_path, site, kind)
+        os.replace(f"{real}.tmp", real)
+    _fsync_dir(data_path)
+
+
+def verify_export(data_path: str, site: str) -> bool:
+    """Check a site's exported csv files against the manifest, finishing an export that crashed after its commit point.
+    Returns False if nothing is exported yet. Raises ValueError if a file doesn't match the manifest.
+
+    Keyword Arguments:
+    data_path -- the folder the scraper exports to
+    site -- the site whose files to check
+    """
+    manifest = read_manifest(data_path, site)
+    if not manifest:
+        # exported before there were manifests, there's nothing to check against
+        return any(os.path.exists(csv_path(data_path, site, kind)) for kind in KINDS)
+
+    for kind in list(KINDS) + [kind for kind in manifest if kind not in KINDS]:
+        path = csv_path(data_path, site, kind)
+        entry = manifest.get(kind)
+        if entry is None:
+            raise ValueError(f"{manifest_path(data_path, site)} has no entry for {kind}")
+        if os.path.exists(path) and checksum(path) == entry["sha256"]:
+            continue
+        # the export crashed between writing the manifest and the renames, finish it
+        tmp = f"{path}.tmp"
+        if os.path.exists(tmp) and checksum(tmp) == entry["sha256"]:
+            os.replace(tmp, path)
+            _fsync_dir(data_path)
+            continue
+        raise ValueError(
+            f"{path} doesn't match {manifest_path(data_path, site)} ({entry['rows']:,} rows), restore it from a backup "
+            "before exporting again"
+        )
+    return True
@@ -0,0 +1,89 @@
+"""
+Cached state geometry for the choropleth maps in the analysis notebook. Every map used to read the full 500k census shape
+file, re-project it to EPSG 2163 and clip Alaska and Hawaii for their insets. `load_state_geometry` does all of that once and
+keeps the result as a GeoParquet file next to the shape file. That file holds simplified, pre-projected polygons for the 50
+states plus DC, and label points for each. Alaska and Hawaii also get their inset geometry (clipped, in lon/lat). After the
+first call a map only needs the small cached file and a join with the per-state values.
+
+NOTE: the shape file can be downloaded here: https://www2.census.gov/geo/tiger/GENZ2018/shp
+"""
+
+import os
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import Polygon
+
+from lists_and_dicts import state_codes
+
+SHAPES_PATH = "./SHAPES/cb_2018_us_state_500k"
+CACHE_PATH = "./SHAPES/us_states_epsg2163.parquet"
+# the projection the notebook maps are drawn in (US National Atlas Equal Area)
+MAP_CRS = "EPSG:2163"
+# how far (in meters, EPSG 2163 is in meters) the simplified outlines may stray from the real ones. At the size the maps are
+# drawn this is well under a pixel
+SIMPLIFY_TOLERANCE = 1_000
+# the insets are drawn in lon/lat, so they get their own tolerance in degrees
+INSET_SIMPLIFY_TOLERANCE = 0.01
+# the boxes the inset states are clipped to, this drops the far western islands
+INSET_CLIPS = {
+    "AK": Polygon([(-170, 50), (-170, 72), (-140, 72), (-140, 50)]),
+    "HI": Polygon([(-160, 0), (-160, 90), (-120, 90), (-120, 0)]),
+}
+
+
+def build_state_geometry(
+    shapes_path: str = SHAPES_PATH, cache_path: str = CACHE_PATH
+) -> gpd.GeoDataFrame:
+    """Read the census shape file, project/simplify/clip the states and write the cache.
+
+    Keyword Arguments:
+    shapes_path -- the census state shape file (folder)
+    cache_path -- where to write the GeoParquet cache
+    """
+    states = gpd.read_file(shapes_path)
+    # there are some non major-50 state codes in here (like Puerto Rico [PR] and Virgin Islands [VI])
+    states = states.loc[states["STUSPS"].isin(state_codes), ["STUSPS", "NAME", "geometry"]]
+
+    # the insets are clipped before projecting, the clip boxes are in lon/lat
+    insets = {}
+    for code, box in INSET_CLIPS.items():
+        state = states[states["STUSPS"] == code]
+        insets[state.index[0]] = state.clip(box).geometry.iloc[0]
+    insets = gpd.GeoSeries(insets, crs=states.crs).simplify(
+        INSET_SIMPLIFY_TOLERANCE, preserve_topology=True
+    )
+
+    states = states.to_crs(MAP_CRS)
+    states["geometry"] = states.simplify(SIMPLIFY_TOLERANCE, preserve_topology=True)
+    # representative points are always inside the polygon (centroids aren't for states like Florida or Michigan)
+    states["label_point"] = states.representative_point()
+    states["inset_geometry"] = insets
+    states = states.reset_index(drop=True)
+
+    tmp = f"{cache_path}.tmp"
+    states.to_parquet(tmp)
+    os.replace(tmp, cache_path)
+    return states
+
+
+def load_state_geometry(
+    cache_path: str = CACHE_PATH, shapes_path: str = SHAPES_PATH
+) -> gpd.GeoDataFrame:
+    """The cached state geometry, built from the shape file the first time. One row per state with columns STUSPS, NAME,
+    geometry (simplified, EPSG 2163), label_point (EPSG 2163) and inset_geometry (lon/lat, AK and HI only)."""
+    if not os.path.exists(cache_path):
+        return build_state_geometry(shapes_path, cache_path)
+    return gpd.read_parquet(cache_path)
+
+
+def join_state_values(
+    states: gpd.GeoDataFrame, values: pd.DataFrame, fill_value=None
+) -> gpd.GeoDataFrame:
+    """Join per-state values (a DataFrame with a `state` code column, e.g. job counts from the aggregates) onto the state
+    geometry. States without a value get `fill_value`."""
+    joined = states.merge(values, left_on="STUSPS", right_on="state", how="left")
+    if fill_value is not None:
+        value_cols = values.columns.drop("state")
+        joined[value_cols] = joined[value_cols].fillna(fill_value)
+    return joined
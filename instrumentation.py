@@ -0,0 +1,105 @@
+"""
+Lightweight timing and counters for the scrape pipeline. The scraper wraps each stage (driver start up, page loads, waits,
+regex parsing, DataFrame concats, export, ...) in `ScrapeMetrics.stage` and bumps counters for things like timeouts. At the
+end of a run a summary is appended to `run_metrics.jsonl` next to `main.log`, one JSON object per run, so runs can be
+compared with a couple lines of pandas (`pd.read_json(LOG_PATH + "/run_metrics.jsonl", lines=True)`).
+"""
+
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+
+class ScrapeMetrics:
+    """Collects stage durations, counters and per page timings for one scrape run of one site."""
+
+    def __init__(self, site: str, run_id: str | None = None):
+        """Keyword Arguments:
+        site -- the site being scraped, used to label the summary
+        run_id -- the run id the scraper's log records are tagged with, so the summary can be matched up with main.log
+        """
+        self.site = site
+        self.run_id = run_id
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        # stage name -> list of durations in seconds
+        self.durations = defaultdict(list)
+        self.counters = Counter()
+        # one record per job board page: which board/query, the page number, how long it took and how many jobs were on it
+        self.pages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the wrapped block and record it under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name].append(time.perf_counter() - start)
+
+    def count(self, name: str, n: int = 1):
+        """Bump a counter (timeouts, missing fields, etc.)."""
+        self.counters[name] += n
+
+    def page(self, board: str, page: int, seconds: float, jobs: int):
+        """Record a fully handled job board page."""
+        self.pages.append(
+            {"board": board, "page": page, "seconds": seconds, "jobs": jobs}
+        )
+
+    def merge(self, other: "ScrapeMetrics"):
+        """Fold in the metrics of another scraper (e.g. a worker of a sharded run)."""
+        for name, durations in other.durations.items():
+            self.durations[name].extend(durations)
+        self.counters.update(other.counters)
+        self.pages.extend(other.pages)
+
+    def summary(self) -> dict:
+        """Boil the raw timings down into a run summary."""
+        elapsed = time.perf_counter() - self._t0
+        stages = {}
+        for name, durations in self.durations.items():
+            d = np.array(durations)
+            stages[name] = {
+                "count": len(d),
+                "total_s": round(float(d.sum()), 4),
+                "mean_ms": round(1000 * float(d.mean()), 3),
+                "p50_ms": round(1000 * float(np.percentile(d, 50)), 3),
+                "p95_ms": round(1000 * float(np.percentile(d, 95)), 3),
+            }
+
+        page_s = np.array([p["seconds"] for p in self.pages])
+        board_minutes = page_s.sum() / 60
+        parse = stages.get("parse", {})
+        return {
+            "site": self.site,
+            "run_id": self.run_id,
+            "started": self.started.isoformat(timespec="seconds"),
+            "elapsed_s": round(elapsed, 3),
+            "pages": len(page_s),
+            "jobs": int(sum(p["jobs"] for p in self.pages)),
+            "page_p50_ms": round(1000 * float(np.percentile(page_s, 50)), 3)
+            if len(page_s)
+            else None,
+            "page_p95_ms": round(1000 * float(np.percentile(page_s, 95)), 3)
+            if len(page_s)
+            else None,
+            "pages_per_minute": round(len(page_s) / board_minutes, 3)
+            if board_minutes
+            else None,
+            "parse_ms_per_page": parse.get("mean_ms"),
+            "timeouts": sum(v for k, v in self.counters.items() if k.startswith("timeout")),
+            "counters": dict(self.counters),
+            "stages": stages,
+        }
+
+    def write(self, log_path: str) -> dict:
+        """Append the run summary to `run_metrics.jsonl` in the log directory and return it."""
+        summary = self.summary()
+        with open(f"{log_path}/run_metrics.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+        return summary
@@ -0,0 +1,96 @@
+"""
+A read-only columnar copy of the exported data for the analysis notebook. Every export also writes `{site}_job-meta.arrow`
+and `{site}_job-descriptions.arrow` (uncompressed Arrow IPC/Feather files) next to the csv files. Since they're uncompressed
+they can be memory mapped, so opening them is close to instant no matter how big the history gets, and only the columns a
+plot actually asks for are ever read off disk. The csv files are still the source of truth, if an .arrow file is missing or
+older than its csv it's rebuilt from the csv the first time it's opened.
+"""
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from export_files import verify_export
+from schema import (
+    enforce_job_descriptions_schema,
+    enforce_job_meta_schema,
+    read_job_descriptions,
+    read_job_meta,
+)
+
+# how to load each exported csv
+_CSV_READERS = {
+    "job-meta": read_job_meta,
+    "job-descriptions": read_job_descriptions,
+}
+
+
+def store_path(data_path: str, site: str, kind: str) -> str:
+    return f"{data_path}/{site}_{kind}.arrow"
+
+
+def write_table(df: pd.DataFrame, path: str):
+    """Write a DataFrame to an uncompressed Feather file, swapping it in atomically so readers never see half a file."""
+    tmp = f"{path}.tmp"
+    # uncompressed so readers can memory map the file and use the columns without copying them
+    feather.write_feather(df, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def write_job_store(
+    data_path: str,
+    site: str,
+    job_meta: pd.DataFrame,
+    job_descriptions: pd.DataFrame,
+):
+    """Write a site's full (already exported) job meta and job descriptions to the store."""
+    write_table(job_meta.reset_index(drop=True), store_path(data_path, site, "job-meta"))
+    write_table(
+        job_descriptions.reset_index(drop=True),
+        store_path(data_path, site, "job-descriptions"),
+    )
+
+
+class JobStore:
+    """Loader for the exported data, e.g.
+
+        store = JobStore(PATH)
+        indeed_job_meta = store.job_meta("Indeed")
+        titles = store.job_meta("DataJobs", columns=["clean_title"])
+    """
+
+    def __init__(self, data_path: str):
+        """
+        Keyword Arguments:
+        data_path -- the folder the scraper exports to (DATA_PATH)
+        """
+        self.data_path = data_path
+
+    def table(self, site: str, kind: str, columns: list[str] | None = None) -> pa.Table:
+        """The memory mapped Arrow table for a site, no data is copied until it's used.
+
+        Keyword Arguments:
+        site -- "Indeed" or "DataJobs"
+        kind -- "job-meta" or "job-descriptions"
+        columns -- only read these columns (default all of them)
+        """
+        path = store_path(self.data_path, site, kind)
+        csv_path = f"{self.data_path}/{site}_{kind}.csv"
+        if not os.path.exists(path) or (
+            os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(path)
+        ):
+            verify_export(self.data_path, site)
+            write_table(_CSV_READERS[kind](csv_path), path)
+        return feather.read_table(path, columns=columns, memory_map=True)
+
+    def job_meta(self, site: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """A site's job meta as a DataFrame with the schema applied."""
+        return enforce_job_meta_schema(self.table(site, "job-meta", columns).to_pandas())
+
+    def job_descriptions(self, site: str, columns: list[str] | None = None) -> pd.DataFrame:
+        """A site's job descriptions as a DataFrame with the schema applied."""
+        return enforce_job_descriptions_schema(
+            self.table(site, "job-descriptions", columns).to_pandas()
+        )
@@ -0,0 +1,78 @@
+"""
+Page readiness for the scraper. Every page used to wait up to `wait_time` seconds for the "NEXT PAGE" link to become
+clickable, and every posting did the same for its description. The last page of every board (which has no next link) always
+sat out the full timeout before the scraper moved on. Now:
+    1) the end of the results is read off the page html we already have. No next link means no waiting at all
+    2) waits are on an extractor script returning what we need (`wait_for_script`) instead of polling for clickability
+    3) the timeouts adapt to each site. `AdaptiveTimeout` keeps the recent wait latencies and uses a multiple of their 95th
+       percentile, so a fast site fails fast and a slow one doesn't time out on pages that were just about to load
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+# how often (in seconds) the waits check the page, the selenium default is 0.5 which is longer than most of our waits take
+POLL_FREQUENCY = 0.05
+
+
+class AdaptiveTimeout:
+    """A wait timeout learned from the latencies of the waits that succeeded."""
+
+    def __init__(
+        self,
+        initial: float = 3,
+        floor: float = 0.5,
+        ceiling: float = 10,
+        factor: float = 3,
+        window: int = 50,
+        min_samples: int = 5,
+    ):
+        """Keyword Arguments:
+        initial -- the timeout until there are enough samples to go on
+        floor -- the shortest timeout it will ever give
+        ceiling -- the longest timeout it will ever give
+        factor -- the timeout is this many times the 95th percentile of the recent latencies
+        window -- number of recent latencies kept
+        min_samples -- number of latencies needed before the timeout adapts
+        """
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.factor = factor
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+
+    @property
+    def timeout(self) -> float:
+        if len(self._latencies) < self.min_samples:
+            return self.initial
+        p95 = float(np.percentile(self._latencies, 95))
+        return float(np.clip(self.factor * p95, self.floor, self.ceiling))
+
+    def observe(self, seconds: float):
+        """Record how long a successful wait took."""
+        self._latencies.append(seconds)
+
+
+def wait_for_script(driver, script: str, ready, timeout: AdaptiveTimeout):
+    """Run a script until its result is ready and return that. On a timeout the last (not ready) result is returned, so the
+    caller still gets whatever was on the page.
+
+    Keyword Arguments:
+    driver -- the selenium driver
+    script -- the JavaScript to run, it should return a value (e.g. the fields it extracted)
+    ready -- result -> whether it's what we were waiting for
+    timeout -- the site's adaptive timeout for this kind of wait, fed the latency when the result is ready
+    """
+    start = time.perf_counter()
+    deadline = start + timeout.timeout
+    while True:
+        result = driver.execute_script(script)
+        if ready(result):
+            timeout.observe(time.perf_counter() - start)
+            return result
+        if time.perf_counter() >= deadline:
+            return result
+        time.sleep(POLL_FREQUENCY)
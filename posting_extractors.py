@@ -0,0 +1,64 @@
+"""
+In-browser extractors for the job postings. Reading a posting used to take a wait for the description element, a
+`get_attribute("innerHTML")` call on it and (for Indeed) the whole `page_source`, which the company/pay/location regexes then
+ran over. That's several WebDriver round trips and a serialization of the full page per posting. Each site now has one script
+that is run with `execute_script` and returns just the fields we need as a small JSON object:
+
+    desc -- the description html, null while it isn't on the page (yet)
+    company, pay, location -- lists of the matching texts (Indeed only), the scraper checks there's the expected number
+
+The texts are what the old regexes captured: the text an element starts with, up to its first child element.
+"""
+
+# shared helpers, prepended to every extractor
+_HELPERS = """
+function leadText(el) {
+    var text = "";
+    for (var node = el.firstChild; node && node.nodeType === Node.TEXT_NODE; node = node.nextSibling) {
+        text += node.nodeValue;
+    }
+    return text.replace(/\\u00a0/g, " ");
+}
+function leadTexts(selector) {
+    return Array.prototype.map.call(document.querySelectorAll(selector), leadText);
+}
+function innerHtml(selector) {
+    var el = document.querySelector(selector);
+    return el ? el.innerHTML : null;
+}
+// elements with `key` in their id, data-testid or class (the old regexes matched it anywhere in the tag)
+function keyed(key, child) {
+    return ["id", "data-testid", "class"]
+        .map(function (attr) { return "[" + attr + '*="' + key + '"]' + (child || ""); })
+        .join(", ");
+}
+"""
+
+DATAJOBS_POSTING_JS = (
+    _HELPERS
+    + """
+return {desc: innerHtml('div#job_description [class="jobpost-table-cell-2"]')};
+"""
+)
+
+INDEED_POSTING_JS = (
+    _HELPERS
+    + """
+var locations = leadTexts(keyed("jobLocationText", " > div > span"));
+if (!locations.length) {
+    // NOTE: There are two different layouts I've found here
+    locations = leadTexts(keyed("job-location"));
+}
+return {
+    desc: innerHtml("#jobDescriptionText"),
+    company: leadTexts("[data-company-name] > span > a"),
+    pay: leadTexts(keyed("salaryInfoAndJobType", " > span")),
+    location: locations,
+};
+"""
+)
+
+
+def description_loaded(posting: dict) -> bool:
+    """Whether an extracted posting has its description yet."""
+    return posting is not None and posting.get("desc") is not None
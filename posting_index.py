@@ -0,0 +1,81 @@
+"""
+A persistent index of every posting we've exported, used to dedup new postings without re-running drop_duplicates over the
+whole history. Each posting gets a 64-bit hash of its normalized url/title/company/location, and the hashes are kept as a
+sorted numpy array in `{site}_posting-index.npz` next to the exported csv files. Checking new rows against the index is a
+binary search per row, so it's O(new rows) no matter how big the history gets.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# the columns that identify a posting (same ones export_data has always deduplicated on)
+KEY_COLUMNS = ["url", "title", "company", "location"]
+
+
+def posting_keys(df: pd.DataFrame) -> np.ndarray:
+    """Hash the key columns of every row into a uint64 key. Values are stripped and lowered, missing values count as ""."""
+    normalized = [
+        df[col].astype(object).fillna("").astype(str).str.strip().str.lower()
+        for col in KEY_COLUMNS
+    ]
+    # join with a separator that can't show up in the scraped text so ("ab", "c") and ("a", "bc") don't collide
+    joined = normalized[0].str.cat(normalized[1:], sep="\x1f")
+    return pd.util.hash_array(joined.to_numpy(dtype=object))
+
+
+def duplicated_postings(df: pd.DataFrame) -> np.ndarray:
+    """Boolean mask of rows that repeat an earlier row's posting key (like `duplicated(keep="first")`)."""
+    return pd.Series(posting_keys(df)).duplicated().to_numpy()
+
+
+class PostingIndex:
+    """Sorted array of posting keys stored on disk, along with the number of exported rows it covers. If that count doesn't
+    match the exported csv anymore (first run with an index, or the csv was edited by hand) the index should be rebuilt."""
+
+    def __init__(self, path: str):
+        """Loads the index if it exists, otherwise starts empty.
+
+        Keyword Arguments:
+        path -- the .npz file the index lives in
+        """
+        self.path = path
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                self.keys = saved["keys"]
+                self.n_rows = int(saved["n_rows"])
+        else:
+            self.keys = np.empty(0, dtype=np.uint64)
+            self.n_rows = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, path: str, df: pd.DataFrame) -> "PostingIndex":
+        """(Re)build the index from scratch out of an existing history."""
+        index = cls.__new__(cls)
+        index.path = path
+        index.keys = np.unique(posting_keys(df))
+        index.n_rows = len(df)
+        return index
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Boolean mask of which of `keys` are already in the index."""
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool)
+        pos = np.searchsorted(self.keys, keys)
+        pos[pos == len(self.keys)] = 0
+        return self.keys[pos] == keys
+
+    def add(self, keys: np.ndarray):
+        """Add the keys of newly exported rows to the index, keeping it sorted and unique."""
+        self.keys = np.union1d(self.keys, keys).astype(np.uint64)
+        self.n_rows += len(keys)
+
+    def save(self):
+        # write next to the real file and swap it in, so a crash never leaves a half written index
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, keys=self.keys, n_rows=self.n_rows)
+        os.replace(tmp, self.path)
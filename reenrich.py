@@ -0,0 +1,205 @@
+"""
+Re-run the derived column rules (`enrich_job_meta`: state, clean_title and salaries from the raw pay strings) over the stored
+history. `clean_data` only derives these for the rows of the current run, so whenever `get_state_code`, `clean_title`,
+`normalize_salaries` or the lists they use (street_sfx, state_codes, ...) improve, the exported csv files keep the old values.
+
+    python reenrich.py --site Indeed --workers 4
+
+The job meta csv is streamed in chunks and the rows are spread over a process pool. The rewritten file is swapped in
+atomically at the end. The key of every enriched row (a hash of its inputs and of the rules themselves) is kept in
+`{site}_enrich-index.npz`, so re-running only touches rows that are new or whose inputs or rules changed. The job store and
+the aggregates are rebuilt afterwards since they hold derived values too.
+"""
+
+import argparse
+import hashlib
+import inspect
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import JobScraper as js
+from aggregates import AnalyticsAggregates
+from export_files import commit_export, verify_export
+from lists_and_dicts import state_codes, state_map, street_sfx
+from scrape_logging import init_worker_logging
+from schema import PULL_DATE_FORMAT, enforce_job_meta_schema, read_job_descriptions, read_job_meta
+
+# the columns the rules read
+INPUT_COLUMNS = ["location", "title", "salary_raw"]
+
+
+def rules_version() -> str:
+    """A fingerprint of the enrichment rules: the source of the functions involved and the lists/patterns they use. Any edit
+    to them changes the version, so there's no version number to remember to bump."""
+    parts = [
+        inspect.getsource(fn)
+        for fn in (
+            js.enrich_job_meta,
+            js.get_state_code,
+            js.clean_title,
+            js.normalize_salaries,
+        )
+    ]
+    parts += [repr(obj) for obj in (street_sfx, state_codes, state_map, js.pay_pattern, js.pay_periods)]
+    return hashlib.blake2b("\x1e".join(parts).encode(), digest_size=8).hexdigest()
+
+
+def enrich_keys(job_meta: pd.DataFrame, version: str) -> np.ndarray:
+    """uint64 key per row from the rules version and the row's inputs. A row needs enriching when its key changed."""
+    inputs = [
+        job_meta[col].astype(object).fillna("").astype(str)
+        if col in job_meta
+        else pd.Series("", index=job_meta.index)
+        for col in INPUT_COLUMNS
+    ]
+    joined = inputs[0].str.cat(inputs[1:], sep="\x1f")
+    return pd.util.hash_array((version + "\x1f" + joined).to_numpy(dtype=object))
+
+
+class EnrichIndex:
+    """job_id -> enrich key of every row as it was last enriched, kept sorted by job_id."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                self.job_ids = saved["job_ids"]
+                self.keys = saved["keys"]
+        else:
+            self.job_ids = np.empty(0, dtype=np.int64)
+            self.keys = np.empty(0, dtype=np.uint64)
+
+    def changed(self, job_ids: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Boolean mask of the rows that are new or whose key doesn't match the stored one."""
+        if not len(self.job_ids):
+            return np.ones(len(job_ids), dtype=bool)
+        pos = np.searchsorted(self.job_ids, job_ids)
+        pos[pos == len(self.job_ids)] = 0
+        return (self.job_ids[pos] != job_ids) | (self.keys[pos] != keys)
+
+    def save(self, job_ids: np.ndarray, keys: np.ndarray):
+        order = np.argsort(job_ids, kind="stable")
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, job_ids=job_ids[order], keys=keys[order])
+        os.replace(tmp, self.path)
+
+
+def _enrich_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # runs in the worker processes
+    return js.enrich_job_meta(chunk)
+
+
+def _collect(chunk: pd.DataFrame, todo: np.ndarray, future) -> pd.DataFrame:
+    # put the enriched rows back into their chunk, in their original order
+    if future is None:
+        return chunk
+    return pd.concat([chunk[~todo], future.result()]).loc[chunk.index]
+
+
+def reenrich(
+    data_path: str,
+    site: str,
+    workers: int = 4,
+    chunksize: int = 20_000,
+    force: bool = False,
+) -> dict:
+    """Re-enrich a site's stored job meta, returns a small summary of what was done.
+
+    Keyword Arguments:
+    data_path -- the folder the scraper exports to
+    site -- the site whose history to re-enrich
+    workers -- number of worker processes
+    chunksize -- number of rows read (and handed to a worker) at a time
+    force -- re-enrich every row, even the ones that look up to date
+    """
+    start = time.perf_counter()
+    # a csv that doesn't match the export manifest raises here instead of being rewritten
+    verify_export(data_path, site)
+    csv_path = f"{data_path}/{site}_job-meta.csv"
+    tmp_path = f"{csv_path}.tmp"
+    index = EnrichIndex(f"{data_path}/{site}_enrich-index.npz")
+    version = rules_version()
+
+    all_ids, all_keys = [], []
+    n_rows = n_enriched = 0
+    header = True
+
+    def write(chunk: pd.DataFrame):
+        nonlocal header
+        chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False, date_format=PULL_DATE_FORMAT)
+        header = False
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_logging) as pool:
+        # chunks waiting on a worker, in file order. bounded so we never hold much more than `workers` chunks in memory
+        pending = deque()
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype={"pull_date": str}):
+            chunk = enforce_job_meta_schema(chunk)
+            keys = enrich_keys(chunk, version)
+            job_ids = chunk["job_id"].to_numpy(dtype=np.int64)
+            todo = np.ones(len(chunk), dtype=bool) if force else index.changed(job_ids, keys)
+            all_ids.append(job_ids)
+            all_keys.append(keys)
+            n_rows += len(chunk)
+            n_enriched += int(todo.sum())
+
+            future = pool.submit(_enrich_chunk, chunk[todo]) if todo.any() else None
+            pending.append((chunk, todo, future))
+            while len(pending) > workers or (pending and pending[0][2] is None):
+                write(_collect(*pending.popleft()))
+        while pending:
+            write(_collect(*pending.popleft()))
+
+    summary = {"site": site, "rules_version": version, "rows": n_rows, "enriched": n_enriched}
+    if header:
+        # nothing was exported yet (or just the header), leave it alone
+        summary["seconds"] = round(time.perf_counter() - start, 2)
+        return summary
+
+    # swap the new file in, it's fsynced and recorded in the export manifest first so a crash can't leave us with an empty
+    # (or unverifiable) csv after the rename
+    commit_export(data_path, site, {"job-meta": n_rows})
+    index.save(np.concatenate(all_ids), np.concatenate(all_keys))
+
+    if n_enriched:
+        # the derived values changed, so the .arrow copy and the aggregates are stale. the job store rebuilds itself from the
+        # (now newer) csv the next time it's opened, the aggregates are rebuilt here
+        aggregates = AnalyticsAggregates(data_path, site)
+        aggregates.rebuild(
+            read_job_meta(csv_path),
+            read_job_descriptions(f"{data_path}/{site}_job-descriptions.csv"),
+        )
+        aggregates.save()
+
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--site", action="append", choices=["Indeed", "DataJobs"], help="site(s) to re-enrich (default both)")
+    parser.add_argument("--data-path", default=js.PATH, help="folder with the exported data (default DATA_PATH)")
+    parser.add_argument("--workers", type=int, default=js.WORKERS, help="worker processes (default the configured workers)")
+    parser.add_argument("--chunksize", type=int, default=20_000)
+    parser.add_argument("--force", action="store_true", help="re-enrich every row, even the up to date ones")
+    args = parser.parse_args(argv)
+
+    for site in args.site or ["Indeed", "DataJobs"]:
+        if not os.path.exists(f"{args.data_path}/{site}_job-meta.csv"):
+            print(f"{site}: nothing exported yet, skipping")
+            continue
+        summary = reenrich(args.data_path, site, args.workers, args.chunksize, args.force)
+        print(
+            f"{site}: re-enriched {summary['enriched']:,} of {summary['rows']:,} rows in {summary['seconds']}s "
+            f"(rules {summary['rules_version']})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Command line entry point for scheduled runs (cron, systemd timers, ...). Scrapes the sites at the same time, each in its own
+process with its own browser, and each site then enriches its rows (`clean_data`) and merges them into its exported history
+(`export_data`).
+
+    python run_scraper.py --incremental --workers 4 --max-pages 100
+
+Prints a line per site with the rows scraped and how long it took, the stage timings go to run_metrics.jsonl as always. Exits
+with 0 when every site finished, 1 when any site failed (the others still export their data) and 2 on bad arguments.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import JobScraper as js
+from scrape_logging import init_worker_logging
+from site_adapters import SITE_ADAPTERS
+
+
+def run_site(
+    site: str,
+    data_path: str,
+    incremental: bool = False,
+    workers: int = 1,
+    max_pages: int | None = None,
+) -> dict:
+    """Scrape, clean and export one site. Returns a summary with the rows scraped and the seconds it took.
+
+    Keyword Arguments:
+    site -- the website to scrape, one of SITE_ADAPTERS
+    data_path -- folder the data is exported to
+    incremental -- skip the postings that are already exported, only new ones get their posting scraped
+    workers -- browsers for the site. More than one splits an Indeed search up with `scrape_sharded`
+    max_pages -- the most pages of a board (or search) to go through, defaults to the configured max_pages
+    """
+    start = time.perf_counter()
+    if site == "Indeed" and workers > 1:
+        scraper = js.scrape_sharded(
+            site,
+            workers,
+            max_pages=max_pages,
+            data_path=data_path if incremental else None,
+        )
+        skipped = scraper.metrics.counters["already_exported"]
+    else:
+        scraper = js.DataJobsScraper(site, max_pages=max_pages)
+        scraper.scrape_jobs()
+        skipped = scraper.drop_exported(data_path) if incremental else 0
+        scraper.scrape_job_text()
+        scraper.clean_data()
+    scraper.export_data(data_path)
+    return {
+        "site": site,
+        "rows": len(scraper.job_meta),
+        "skipped": skipped,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--site", action="append", choices=list(SITE_ADAPTERS), help="site(s) to scrape (default all)")
+    parser.add_argument("--data-path", default=js.PATH, help="folder to export the data to (default DATA_PATH)")
+    parser.add_argument(
+        "--incremental", action="store_true", help="only scrape the postings that aren't exported yet"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=js.WORKERS, help="browsers for Indeed, split up by search (default the configured workers)"
+    )
+    parser.add_argument(
+        "--max-pages", type=int, help="most pages of a board or search to go through (default the configured max_pages)"
+    )
+    args = parser.parse_args(argv)
+    if args.data_path is None:
+        parser.error("no --data-path given and DATA_PATH isn't set")
+    if args.workers < 1 or (args.max_pages is not None and args.max_pages < 1):
+        parser.error("--workers and --max-pages have to be at least 1")
+
+    sites = args.site or list(SITE_ADAPTERS)
+    start = time.perf_counter()
+    failed = []
+    # a process per site, every one starts its own browser (and Indeed its own pool of them)
+    with ProcessPoolExecutor(max_workers=len(sites), initializer=init_worker_logging) as pool:
+        futures = {
+            site: pool.submit(run_site, site, args.data_path, args.incremental, args.workers, args.max_pages)
+            for site in sites
+        }
+        for site, future in futures.items():
+            try:
+                summary = future.result()
+            except Exception:
+                logging.exception("%s run failed", site)
+                print(f"{site}: failed, see main.log", file=sys.stderr)
+                failed.append(site)
+                continue
+            print(
+                f"{site}: scraped {summary['rows']:,} postings ({summary['skipped']:,} already exported) "
+                f"in {summary['seconds']}s"
+            )
+
+    print(f"finished in {time.perf_counter() - start:.2f}s, {len(sites) - len(failed)} of {len(sites)} sites ok")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
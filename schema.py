@@ -0,0 +1,82 @@
+"""
+The column types for the scraped data. job_meta used to be all object columns: the same handful of site/category/state strings
+repeated on every row, salaries mixing NaN, floats and stray strings, and the pull date as a "%m/%d/%Y" string. Enforcing
+an explicit schema keeps memory down (categoricals, float32) and makes the notebook groupbys a lot faster. The schema is
+applied when scraping, when exporting and when loading the csv files back in.
+"""
+
+import pandas as pd
+
+# the csv files keep the original date format so older exports and newer ones read the same way
+PULL_DATE_FORMAT = r"%m/%d/%Y"
+
+JOB_META_SCHEMA = {
+    "url": "string",
+    "title": "string",
+    "company": "string",
+    "location": "string",
+    "salary_lower": "float32",
+    "salary_upper": "float32",
+    "salary_raw": "string",
+    "job_category": "category",
+    "site": "category",
+    "job_id": "Int64",
+    "pull_date": "datetime64[ns]",
+    "state": "category",
+    "clean_title": "category",
+}
+
+JOB_DESCRIPTIONS_SCHEMA = {
+    "job_id": "Int64",
+    "title": "string",
+    "company": "string",
+    "desc": "string",
+    "version": "Int64",
+}
+
+
+def enforce_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Cast every column in `schema` that exists in `df` to its schema type. Columns not in the schema are left alone.
+
+    Keyword Arguments:
+    df -- the DataFrame to cast
+    schema -- column name -> dtype, one of the schemas above
+    """
+    df = df.copy()
+    for col, dtype in schema.items():
+        if col not in df:
+            continue
+        if dtype.startswith("float"):
+            # DataJobs salaries come in as "145,000" (or "" when there's no salary)
+            values = df[col]
+            if values.dtype == object or pd.api.types.is_string_dtype(values):
+                values = values.astype("string").str.replace(",", "")
+            df[col] = pd.to_numeric(values, errors="coerce").astype(dtype)
+        elif dtype.startswith("datetime"):
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], format=PULL_DATE_FORMAT, errors="coerce")
+            # Arrow round trips can hand back other units (e.g. datetime64[us])
+            df[col] = df[col].astype(dtype)
+        elif dtype == "Int64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def enforce_job_meta_schema(job_meta: pd.DataFrame) -> pd.DataFrame:
+    return enforce_schema(job_meta, JOB_META_SCHEMA)
+
+
+def enforce_job_descriptions_schema(job_descriptions: pd.DataFrame) -> pd.DataFrame:
+    return enforce_schema(job_descriptions, JOB_DESCRIPTIONS_SCHEMA)
+
+
+def read_job_meta(path: str, **kwargs) -> pd.DataFrame:
+    """Load an exported job meta csv with the schema applied. Extra keyword arguments go to `pd.read_csv`."""
+    return enforce_job_meta_schema(pd.read_csv(path, dtype={"pull_date": str}, **kwargs))
+
+
+def read_job_descriptions(path: str, **kwargs) -> pd.DataFrame:
+    """Load an exported job descriptions csv with the schema applied. Extra keyword arguments go to `pd.read_csv`."""
+    return enforce_job_descriptions_schema(pd.read_csv(path, **kwargs))
@@ -0,0 +1,114 @@
+"""
+Run configuration for the scraper. The knobs used to be module constants in JobScraper.py (`HEADLESS = False`,
+`wait_time = 3`, the 300 page cap, ...), so a production run meant editing the source. Settings now come from, in order
+(later ones win):
+    1) the defaults below
+    2) the profile (`SCRAPER_PROFILE`, "prod" unless set). "prod" runs a headless, lean browser, "dev" opens a normal Chrome
+       window so you can watch the scraper
+    3) a TOML config file (`SCRAPER_CONFIG`, or `scraper.toml` in the working directory if there is one). Top level keys
+       apply to every profile, `[profiles.<name>]` tables to just that profile
+    4) environment variables (and the `.env` file): `SCRAPER_<SETTING>`, e.g. `SCRAPER_MAX_PAGES=50`. The paths keep their
+       old names, `DATA_PATH` and `LOG_PATH`
+
+e.g. a scraper.toml:
+
+    max_pages = 100
+
+    [profiles.dev]
+    posting_tabs = 1
+"""
+
+import os
+import tomllib
+
+from dotenv import load_dotenv
+
+DEFAULTS = {
+    # where the data and the logs go
+    "data_path": None,
+    "log_path": None,
+    # run the browser without a window, and without images, extensions, etc. (see DriverBuilder.get_driver)
+    "headless": True,
+    "lean_browser": True,
+    # how long (seconds) selenium waits for an element or a page until the scraper has learned how fast the site is
+    "wait_time": 3.0,
+    # how often (seconds) the scraper checkpoints its progress
+    "checkpoint_every": 120,
+    # the most pages of a job board (or search) to go through
+    "max_pages": 300,
+    # job board pages prefetched in background tabs, and job postings loaded at once in tabs of one browser
+    "prefetch_pages": 2,
+    "posting_tabs": 4,
+    # restart the browser after this many pages, or once it uses more than this much memory (0 never), see driver_supervisor.py
+    "recycle_pages": 500,
+    "recycle_rss_mb": 1500.0,
+    # seconds a page (or posting) can take before the browser is taken for hung, and how often a page is retried on a fresh
+    # browser after the old one died on it
+    "watchdog_timeout": 120.0,
+    "driver_retries": 2,
+    # re-visited descriptions whose SimHash is at most this many bits from the stored one's count as unchanged, 0 only counts
+    # exact matches (and skips the SimHash), see desc_fingerprints.py
+    "simhash_distance": 0,
+    # worker processes (and browsers) for sharded runs and re-enrichment
+    "workers": 4,
+    # multiplies the random pauses the sites get between requests (0 turns them off)
+    "delay_scale": 1.0,
+    # "arrow" writes memory mapped .arrow copies next to the csv files on export (see job_store.py), "csv" just the csv files
+    "storage": "arrow",
+}
+
+PROFILES = {
+    "prod": {},
+    "dev": {"headless": False, "lean_browser": False},
+}
+
+# settings that keep the environment variable names they've always had
+_ENV_NAMES = {"data_path": "DATA_PATH", "log_path": "LOG_PATH"}
+STORAGE_BACKENDS = ("arrow", "csv")
+
+
+def _parse(value: str, default):
+    # environment variables are strings, turn them into the type of the setting
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def load_config(path: str | None = None, profile: str | None = None) -> dict:
+    """Put the settings together from the defaults, the profile, the config file and the environment.
+
+    Keyword Arguments:
+    path -- the TOML config file, defaults to SCRAPER_CONFIG or ./scraper.toml (no file is fine)
+    profile -- the profile to use, defaults to SCRAPER_PROFILE or "prod"
+    """
+    load_dotenv()
+    profile = profile or os.getenv("SCRAPER_PROFILE", "prod")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile}, expected one of {list(PROFILES)}")
+
+    config = dict(DEFAULTS, **PROFILES[profile])
+
+    path = path or os.getenv("SCRAPER_CONFIG", "scraper.toml")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            file_config = tomllib.load(f)
+        profile_config = file_config.pop("profiles", {}).get(profile, {})
+        for settings in (file_config, profile_config):
+            unknown = set(settings) - set(DEFAULTS)
+            if unknown:
+                raise ValueError(f"Unknown settings in {path}: {sorted(unknown)}")
+            config.update(settings)
+
+    for key, default in DEFAULTS.items():
+        value = os.getenv(_ENV_NAMES.get(key, f"SCRAPER_{key.upper()}"))
+        if value is not None:
+            config[key] = _parse(value, default if default is not None else "")
+
+    if config["storage"] not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage {config['storage']}, expected one of {STORAGE_BACKENDS}")
+    config["profile"] = profile
+    return config
@@ -0,0 +1,151 @@
+"""
+Logging setup for the scraper. `logging.basicConfig` used to write every record to `main.log` synchronously from the thread
+that logged it, right in the middle of the page and posting loops. Here the loggers only put records on a queue (a
+`QueueHandler`), and a background `QueueListener` thread formats them and does the file I/O. Records are written as one JSON
+object per line, so they can be loaded with `pd.read_json(LOG_PATH + "/main.log", lines=True)`.
+
+On top of that:
+    1) every record carries the run id (and site) of the scrape run it came from, so the logs of a run (including the
+       workers of a sharded run) can be pulled out of the shared log file
+    2) repeats of the same warning are rate limited. The first one is logged, repeats within `repeat_interval` seconds are
+       dropped before they're even queued, and the next one that gets through says how many were dropped
+    3) log calls should pass their arguments lazily (`logging.warning("... %s", x)`), so messages below the log level are
+       never formatted, and the repeats that get dropped aren't either
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.util import Finalize
+
+# the attributes every LogRecord has, anything else on a record came in through `extra=` and is written as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# the run every record gets tagged with (each process has its own, workers are handed the parent's with `start_run`)
+_run = {"run_id": None, "site": None}
+# the listener of this process (and the pid it was started in, forked workers inherit it without its thread) and the
+# settings it was started with
+_listener = None
+_listener_pid = None
+_settings = {}
+
+
+def start_run(site: str | None = None, run_id: str | None = None) -> str:
+    """Start tagging log records with a run id (a new one unless `run_id` is given, e.g. by a parent process). Returns the run
+    id."""
+    _run["run_id"] = run_id or uuid.uuid4().hex[:12]
+    _run["site"] = site
+    return _run["run_id"]
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a single line JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RunContextFilter(logging.Filter):
+    """Tags records with the current run id and site."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = _run["run_id"]
+        record.site = _run["site"]
+        return True
+
+
+class RepeatFilter(logging.Filter):
+    """Rate limits repeats of the same warning. Records are the same when they come from the same logger with the same
+    unformatted message, so "Not the correct number of salaries for ID:%s" counts as one warning no matter the job."""
+
+    def __init__(self, interval: float = 60, level: int = logging.WARNING):
+        """Keyword Arguments:
+        interval -- seconds during which repeats of a warning are dropped
+        level -- only records of exactly this level are rate limited (errors always get through)
+        """
+        super().__init__()
+        self.interval = interval
+        self.level = level
+        # (logger, message template) -> (time it was last let through, number of repeats dropped since)
+        self._seen = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != self.level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        last, dropped = self._seen.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self._seen[key] = (last, dropped + 1)
+            return False
+        self._seen[key] = (now, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+def setup_logging(
+    log_path: str, level: int = logging.WARNING, repeat_interval: float = 60
+) -> QueueListener:
+    """Route all logging through a queue to `{log_path}/main.log`. Safe to call more than once, it only sets things up once per
+    process.
+
+    Keyword Arguments:
+    log_path -- the folder main.log lives in (LOG_PATH)
+    level -- the root log level
+    repeat_interval -- seconds during which repeats of a warning are dropped
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return _listener
+    _settings.update(log_path=log_path, level=level, repeat_interval=repeat_interval)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # the filters run on the logging thread, before the record is queued: this is where the run id is picked up, and
+    # dropped repeats never cost more than a dict lookup
+    queue_handler.addFilter(RunContextFilter())
+    queue_handler.addFilter(RepeatFilter(repeat_interval))
+
+    file_handler = logging.FileHandler(f"{log_path}/main.log", encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    # flush whatever is still queued when the interpreter exits
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def init_worker_logging():
+    """Process pool initializer (or call it from one). A forked worker inherits the queue handler but not the listener thread,
+    so this starts a listener for the worker. Workers leave through os._exit, which skips atexit, so the listener is stopped
+    (and the queue flushed) by a multiprocessing finalizer instead."""
+    if not _settings:
+        return
+    listener = setup_logging(**_settings)
+    # a low priority so it runs after the other finalizers (e.g. quitting the browser) have logged what they had to
+    Finalize(None, listener.stop, exitpriority=0)
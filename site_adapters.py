@@ -0,0 +1,368 @@
+"""
+Everything the scraper knows about a particular job board site. `DataJobsScraper` used to have a board scraper and a
+posting scraper per site, each with its own copy of the paging loop, the entity cleaning and the record keeping. Now the
+scraper is one engine (paging, prefetching, tabs, waits, rate limiting, checkpoints, storage) and a site is a `SiteAdapter`
+that only answers the site specific questions:
+    1) which boards/searches are there (`boards`) and what are the urls of their next pages (`next_page_urls`)
+    2) what jobs are on a board page (`parse_board`)
+    3) where is a job's posting (`posting_url`) and what's on it (`posting_js`, `parse_posting`)
+
+To add a site, subclass `SiteAdapter` and add it to `SITE_ADAPTERS`.
+"""
+
+import logging
+import time
+from urllib.parse import urljoin
+
+import regex as re
+
+from posting_extractors import DATAJOBS_POSTING_JS, INDEED_POSTING_JS, description_loaded
+
+# this pattern pulls jobs specifically from datajobs.
+# NOTE: the greedy (.*) groups backtrack terribly on malformed pages (one bad page can stall the scraper for minutes) so this is
+# only used as a fallback by `parse_datajobs_board`, and only with a timeout
+dj_pattern = r"<a href=\"(.*)\"><strong>(.*)</strong> – <span [^\>]*>(.*)</span></a>[\n\s]*</div>[\n\s]*<div[^\>]*>[\n\s]*<em>[\n\s]*<span[^\>]*>(.*)</span>[\n\s]*[\&nbsp;\•]*[\n\s]*\$*([\d,]*)[–\s]*\$*([\d,]*)[\n\s]*</em>"
+# the DataJobs board parser finds the start of every listing and then matches the fields of each listing with small, bounded
+# patterns. none of the repeated character classes overlap with what follows them, so parsing is linear in the page size
+dj_listing_start = re.compile(r'<a href="([^"<>]{1,1000})"><strong>')
+dj_listing_fields = re.compile(
+    r"([^<]{0,500})</strong> – <span [^>]{0,500}>([^<]{0,500})</span></a>\s{0,500}</div>\s{0,500}<div[^>]{0,500}>\s{0,500}"
+    r"<em>\s{0,500}<span[^>]{0,500}>([^<]{0,500})</span>\s{0,500}[&nbsp;•]{0,100}\s{0,500}"
+    r"\$?([\d,]{0,20})[–\s]{0,100}\$?([\d,]{0,20})\s{0,100}</em>"
+)
+# the most time (in seconds) we'll spend parsing a single job board page
+dj_parse_budget = 2
+# every Indeed link (organic /rc/clk? or sponsored /pagead/) carries the posting's job key as its jk parameter
+indeed_jk_pattern = re.compile(r"(?:[?&]|&amp;)jk=([0-9a-fA-F]+)")
+# the next page links, the last page of the results doesn't have one
+dj_next_page = re.compile(r'<a\s[^>]*href="([^"]*)"[^>]*>\s*NEXT PAGE\s*<')
+indeed_next_page = re.compile(r"data-testid=\"[^\"]*pagination-page-next")
+# the page number in a DataJobs board url, e.g. /Data-Science-Jobs~2
+dj_page_number = re.compile(r"~(\d+)")
+# Indeed pages through the results 10 at a time with the start parameter
+indeed_page_size = 10
+
+
+def cleanhtml(html_string: str) -> str:
+    """Regex pattern to match and remove all html tags and comments, leaving plain text."""
+    html_string2 = re.sub("(<!--.*?-->)", "", html_string, flags=re.DOTALL)
+    cleaned_html = re.sub(
+        "<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});", " ", html_string2
+    )
+    return cleaned_html
+
+
+def clean_entities(value):
+    """Replace the html entities that would confuse the CSV format. Anything that isn't a string is passed through."""
+    if type(value) != str:
+        return value
+    return (
+        value.replace("&amp;", "&")
+        .replace("&amp,", "&")
+        .replace("&nbsp;", " ")
+        .replace("&nbsp,", " ")
+    )
+
+
+def parse_datajobs_board(page_html: str, budget: float = dj_parse_budget) -> list:
+    """Pull (url, title, company, location, salary_lower, salary_upper) tuples out of a DataJobs job board page.
+
+    The page is split on the start of each listing and the fields of each listing are matched with bounded patterns, so a
+    malformed page can't blow up the parse time. Listings the bounded patterns can't read (say the markup changed a little)
+    fall back to the old `dj_pattern`, run on just that listing. If parsing runs over `budget` seconds we stop and keep what
+    we have.
+
+    Keyword Arguments:
+    page_html -- the job board page source
+    budget -- the most time (in seconds) to spend on this page
+    """
+    deadline = time.perf_counter() + budget
+    try:
+        starts = list(dj_listing_start.finditer(page_html, timeout=budget))
+    except TimeoutError:
+        logging.error("Timed out finding DataJobs listings after %ss", budget)
+        return []
+
+    listings = []
+    fallbacks = 0
+    for k, start in enumerate(starts):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            logging.warning(
+                "DataJobs page ran over its %ss parse budget, keeping %s of %s listings",
+                budget,
+                len(listings),
+                len(starts),
+            )
+            break
+        # each listing can only run up to where the next one starts
+        end = starts[k + 1].start() if k + 1 < len(starts) else len(page_html)
+        fields = dj_listing_fields.match(page_html, start.end(), end)
+        if fields:
+            listings.append((start.group(1),) + fields.groups())
+            continue
+
+        # the fallback only ever sees this one listing, and gets a timeout on top of that
+        fallbacks += 1
+        try:
+            fields = re.match(
+                dj_pattern, page_html[start.start() : end], timeout=remaining
+            )
+        except TimeoutError:
+            fields = None
+        if fields:
+            listings.append(fields.groups())
+
+    if fallbacks:
+        logging.warning(
+            "%s DataJobs listings needed the dj_pattern fallback, %s of %s parsed",
+            fallbacks,
+            len(listings),
+            len(starts),
+        )
+    return listings
+
+
+def indeed_job_key(link: str) -> str | None:
+    """Pull the job key (the jk id) out of an Indeed job link, None if the link doesn't have one."""
+    match = indeed_jk_pattern.search(link)
+    return match.group(1).lower() if match else None
+
+
+def datajobs_page_urls(page_html: str, page_url: str, n: int) -> list:
+    """The urls of the next `n` pages of a DataJobs board, worked out from the next page link of the current page (empty on
+    the last page)."""
+    next_link = dj_next_page.search(page_html)
+    if next_link is None:
+        return []
+    next_url = urljoin(page_url, next_link[1].replace("&amp;", "&"))
+    number = dj_page_number.search(next_url)
+    if number is None:
+        # can't tell where the page number is, just the next page then
+        return [next_url]
+    return [
+        next_url[: number.start(1)] + str(int(number[1]) + k) + next_url[number.end(1) :]
+        for k in range(n)
+    ]
+
+
+def indeed_page_url(search_url: str, page: int) -> str:
+    """The url of a page (counting from 0) of an Indeed search."""
+    if page == 0:
+        return search_url
+    return f"{search_url}&start={page * indeed_page_size}"
+
+
+class SiteAdapter:
+    """The site specific parts of scraping a job board site. The scraper handles everything else."""
+
+    # the name the site goes by in file names and the `site` argument, and the url stored in job_meta's site column
+    name = None
+    site_url = None
+    # the in-browser extractor run on every posting, see posting_extractors.py
+    posting_js = None
+    # the (low, high) range of the random pause (in seconds) before each board and each posting, None for no pause
+    board_delay = None
+    posting_delay = None
+    # whether a posting's url alone identifies it (the scraper then dedups on the url too)
+    canonical_urls = False
+
+    def boards(self, queries: list) -> list:
+        """The (board key, job category, first page url) of every board or search to go through. The board key names the
+        board in checkpoints and metrics.
+
+        Keyword Arguments:
+        queries -- the (job title, location) pairs the scraper was given, for sites with a search
+        """
+        raise NotImplementedError
+
+    def parse_board(self, page_html: str, category: str) -> list:
+        """The jobs on a board page, as dicts of url, title, company, location, salary_lower, salary_upper and job_category."""
+        raise NotImplementedError
+
+    def next_page_urls(
+        self, page_html: str, board_url: str, page_url: str, page: int, n: int
+    ) -> list:
+        """The urls of (up to) the next `n` pages after page number `page`, empty on the last page.
+
+        Keyword Arguments:
+        page_html -- the current page source
+        board_url -- the first page url of the board
+        page_url -- the current page url
+        page -- the current page number (counting from 0)
+        n -- number of urls wanted
+        """
+        raise NotImplementedError
+
+    def posting_url(self, job) -> str:
+        """The url of a job's posting (`job` is a job_meta row with job_id, url, title and company)."""
+        return job.url
+
+    def parse_posting(self, job, extracted: dict) -> tuple[dict | None, dict | None]:
+        """Turn what `posting_js` extracted into (details, description). details are the job_meta fields found on the posting
+        (job_id, company, location, salary_raw), None if the site has none. description is the job_descriptions record, None
+        if the description couldn't be found."""
+        raise NotImplementedError
+
+    def _description(self, job, extracted: dict, company: str) -> dict | None:
+        # the job_descriptions record, the description html boiled down to plain text
+        if not description_loaded(extracted):
+            return None
+        return {
+            "job_id": job.job_id,
+            "title": job.title,
+            "company": company,
+            "desc": clean_entities(cleanhtml(extracted["desc"])),
+        }
+
+
+class DataJobsAdapter(SiteAdapter):
+    """DataJobs.com, two boards: Data Science/Analytics jobs and Data Engineering jobs."""
+
+    name = "DataJobs"
+    site_url = "https://datajobs.com/"
+    posting_js = DATAJOBS_POSTING_JS
+    # board path -> job category
+    board_paths = {
+        "/Data-Science-Jobs": "Data Science & Analytics",
+        "/Data-Engineering-Jobs": "Data Engineering",
+    }
+
+    def boards(self, queries: list) -> list:
+        return [(bp, cat, self.site_url + bp) for bp, cat in self.board_paths.items()]
+
+    def parse_board(self, page_html: str, category: str) -> list:
+        columns = ["url", "title", "company", "location", "salary_lower", "salary_upper"]
+        return [
+            dict(zip(columns, map(clean_entities, listing)), job_category=category)
+            for listing in parse_datajobs_board(page_html)
+        ]
+
+    def next_page_urls(
+        self, page_html: str, board_url: str, page_url: str, page: int, n: int
+    ) -> list:
+        return datajobs_page_urls(page_html, page_url, n)
+
+    def posting_url(self, job) -> str:
+        # the url is relative to the site
+        return self.site_url + job.url[1:]
+
+    def parse_posting(self, job, extracted: dict) -> tuple[dict | None, dict | None]:
+        # everything but the description is already on the board
+        return None, self._description(job, extracted, job.company)
+
+
+class IndeedAdapter(SiteAdapter):
+    """Indeed.com, one search per (job title, location) query. Indeed has many more jobs than DataJobs so we run into the page
+    limitation more often. Company, location and pay are only on the postings."""
+
+    name = "Indeed"
+    site_url = "https://indeed.com/"
+    posting_js = INDEED_POSTING_JS
+    # this is rate limiting to limit the "are you a human?" Issue.
+    # NOTE: Indeed does allow scraping, check the robots.txt
+    board_delay = (0.1, 0.9)
+    posting_delay = (0.1, 1.4)
+    # links are canonical job key urls, one per posting no matter which page or query it showed up on
+    canonical_urls = True
+
+    def boards(self, queries: list) -> list:
+        return [
+            (
+                f"{job} || {state}",
+                job,
+                f"{self.site_url}jobs?q={job.lower().replace(' ','+')}&l={state}",
+            )
+            for job, state in queries
+        ]
+
+    def parse_board(self, page_html: str, category: str) -> list:
+        # scrape job titles and links
+        titles = re.findall("<span[^>]*jobTitle[^>]*>(?<=>)(.*?)(?=<)", page_html)
+        links = re.findall('<h2[^>]*jobTitle[^>]*><a[^>]*href="([^">]*)">', page_html)
+        # company, location and salary come from the posting
+        return [
+            {"url": link, "title": clean_entities(title), "job_category": category}
+            for link, title in zip(self.clean_links(links), titles)
+        ]
+
+    def next_page_urls(
+        self, page_html: str, board_url: str, page_url: str, page: int, n: int
+    ) -> list:
+        if indeed_next_page.search(page_html) is None:
+            return []
+        return [indeed_page_url(board_url, p) for p in range(page + 1, page + 1 + n)]
+
+    def parse_posting(self, job, extracted: dict) -> tuple[dict | None, dict | None]:
+        # this part contains most of the information about the job
+        details = {
+            "job_id": job.job_id,
+            "company": None,
+            "location": None,
+            "salary_raw": None,
+        }
+
+        company_name = extracted["company"]
+        if len(company_name) == 1:
+            details["company"] = clean_entities(company_name[0])
+        else:
+            logging.warning(
+                "Not the correct number of company names for ID:%s TITLE: %s. Found: %s",
+                job.job_id,
+                job.title,
+                company_name,
+            )
+            company_name = [""]
+
+        pay = extracted["pay"]
+        if len(pay) == 1:
+            # makes sure there are numbers in the string and that it isn't empty
+            # the raw string is kept, all the salaries get normalized in one go at the end
+            if pay[0].strip() != "" and re.findall(r"\d", pay[0]):
+                details["salary_raw"] = pay[0]
+        else:
+            logging.warning(
+                "Not the correct number of salaries for ID:%s TITLE: %s Found: %s",
+                job.job_id,
+                job.title,
+                pay,
+            )
+
+        location = extracted["location"]
+        if len(location) in (1, 2):
+            details["location"] = clean_entities(location[0])
+        else:
+            logging.warning(
+                "Not the correct number of locations for ID:%s TITLE: %s. Found: %s",
+                job.job_id,
+                job.title,
+                location,
+            )
+
+        return details, self._description(job, extracted, company_name[0])
+
+    def clean_links(self, links: list) -> list:
+        """Takes a list of indeed job link suffixes and returns the real job posting links. The same posting shows up with
+        different tracking parameters across pages and queries, so wherever we can we link straight to the job key, that way
+        the url alone identifies the posting."""
+        clean_links = []
+        for link in links:
+            jk = indeed_job_key(link)
+            if jk is not None:
+                clean_links.append(f"https://www.indeed.com/viewjob?jk={jk}")
+            elif link.startswith("/rc/clk?"):
+                clean_links.append(
+                    "https://www.indeed.com/viewjob?" + link[8:].replace("&amp;", "&")
+                )
+            elif link.startswith("/pagead"):
+                clean_links.append(
+                    "https://www.indeed.com" + link.replace("&amp;", "&")
+                )
+            else:
+                logging.critical("We haven't handled this link type: %s", link[:20])
+                clean_links.append(link)
+
+        return clean_links
+
+
+SITE_ADAPTERS = {adapter.name: adapter for adapter in (DataJobsAdapter, IndeedAdapter)}
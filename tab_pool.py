@@ -0,0 +1,123 @@
+"""
+Background tabs for the scraper's Chrome driver. Selenium only talks to one tab at a time and `driver.get` blocks until the page
+has loaded, so the scraper used to sit idle while every page loaded and the browser sat idle while the scraper parsed. A
+`TabPool` opens a few extra tabs in the same browser and starts loading pages in them without waiting (the navigation is
+kicked off from a `setTimeout` in the tab, so the selenium call returns right away). The browser keeps loading them in the
+background while the scraper parses the current page, and `open` then switches to a page that's (usually) already there.
+"""
+
+import time
+
+from selenium.webdriver.support.wait import WebDriverWait
+
+from page_readiness import POLL_FREQUENCY, AdaptiveTimeout
+
+# marks the page a tab is leaving, the page it navigates to doesn't have the flag. Without it the old page (which is already
+# "complete") would look like the loaded new one
+_NAVIGATE_JS = """
+var url = arguments[0];
+window.__tabPoolPending = true;
+setTimeout(function () { window.location.href = url; }, 0);
+"""
+_READY_JS = "return !window.__tabPoolPending && document.readyState === 'complete';"
+
+
+class TabPool:
+    """A fixed number of background tabs that load pages ahead of time."""
+
+    def __init__(self, driver, size: int, timeout: AdaptiveTimeout | None = None):
+        """Opens the tabs, the driver is left on the tab it was on.
+
+        Keyword Arguments:
+        driver -- the selenium driver
+        size -- number of background tabs. With 0 every page is loaded in the main tab with `driver.get`
+        timeout -- how long to wait for a page to finish loading, fed the load times
+        """
+        self.driver = driver
+        self.timeout = timeout or AdaptiveTimeout()
+        self._main = driver.current_window_handle
+        self._free = []
+        for _ in range(size):
+            driver.switch_to.new_window("tab")
+            self._free.append(driver.current_window_handle)
+        driver.switch_to.window(self._main)
+        # url -> (tab, time it started loading), in the order they were started
+        self._loading = {}
+        # the tab `open` switched to, it goes back to the free tabs on `release`
+        self._current = None
+
+    @property
+    def size(self) -> int:
+        return len(self._free) + len(self._loading) + (self._current is not None)
+
+    def idle(self) -> int:
+        """Number of tabs not loading (or holding) a page."""
+        return len(self._free)
+
+    def loading(self) -> list:
+        """The urls being loaded in the background, oldest first."""
+        return list(self._loading)
+
+    def load(self, url: str) -> bool:
+        """Start loading a page in a free tab, without waiting for it. Returns False if there's no free tab (or it's already
+        loading)."""
+        if url in self._loading:
+            return True
+        if not self._free:
+            return False
+        tab = self._free.pop()
+        self.driver.switch_to.window(tab)
+        self.driver.execute_script(_NAVIGATE_JS, url)
+        self._loading[url] = (tab, time.perf_counter())
+        self.driver.switch_to.window(self._main)
+        return True
+
+    def ready(self) -> list:
+        """The urls that finished loading in the background (checks every loading tab)."""
+        done = []
+        for url, (tab, _) in self._loading.items():
+            self.driver.switch_to.window(tab)
+            if self.driver.execute_script(_READY_JS):
+                done.append(url)
+        self.driver.switch_to.window(self._main)
+        return done
+
+    def open(self, url: str):
+        """Make the driver show `url`: switches to the tab it's loading in (waiting for it to finish), or loads it in the main tab
+        if it isn't being loaded. Raises selenium's TimeoutException if the page takes too long. Call `release` when done with
+        the page."""
+        self.release()
+        if url not in self._loading:
+            start = time.perf_counter()
+            self.driver.get(url)
+            self.timeout.observe(time.perf_counter() - start)
+            return
+        tab, started = self._loading.pop(url)
+        self._current = tab
+        self.driver.switch_to.window(tab)
+        WebDriverWait(self.driver, self.timeout.timeout, poll_frequency=POLL_FREQUENCY).until(
+            lambda driver: driver.execute_script(_READY_JS)
+        )
+        self.timeout.observe(time.perf_counter() - started)
+
+    def release(self):
+        """Done with the page `open` switched to, its tab can load the next one."""
+        if self._current is not None:
+            self._free.append(self._current)
+            self._current = None
+        self.driver.switch_to.window(self._main)
+
+    def cancel(self):
+        """Forget the pages loading in the background (e.g. past the last page of a board), their tabs get reused."""
+        self._free.extend(tab for tab, _ in self._loading.values())
+        self._loading.clear()
+
+    def close(self):
+        """Close the background tabs, the driver is left on the main tab."""
+        self.release()
+        self.cancel()
+        for tab in self._free:
+            self.driver.switch_to.window(tab)
+            self.driver.close()
+        self._free = []
+        self.driver.switch_to.window(self._main)